@@ -0,0 +1,28 @@
+import sys
+import os
+import argparse
+cwd = os.getcwd()
+dir_for_working_code = os.path.join(cwd, 'working-code')
+sys.path.append(os.path.abspath(dir_for_working_code))
+from helper_functions import readDirectoryAsDocuments
+from annotation_list_creation_utilities import readOneWordPerLineFileAsContentWordDict
+from corpus_annotation import buildFormAutomaton, annotateChunks, writeAnnotations
+# ------------------------------------------------------------------------------
+# Annotates the whole corpus with the lemmata of content_words.txt in one pass:
+# every occurrence of one of their forms is written to annotations.tsv as
+# source, line, start, end (character offsets in the chunk), text, lemmata.
+# ------------------------------------------------------------------------------
+
+parser = argparse.ArgumentParser(description="Tag every content word form in the corpus with its lemma(ta).")
+parser.add_argument("--output", default="annotations.tsv")
+parser.add_argument("--corpus", default="corpus")
+parser.add_argument("--tei-directory", default=None, help="also annotate the TEI files in this directory")
+parser.add_argument("--lines-per-chunk", type=int, default=1000, help="how much of a file is read at once")
+arguments = parser.parse_args()
+
+content_words = readOneWordPerLineFileAsContentWordDict("content_words.txt")
+automaton = buildFormAutomaton(content_words)
+print("Compiled the forms of " + str(len(content_words)) + " lemmata into " + str(len(automaton)) + " states.")
+chunks = readDirectoryAsDocuments(arguments.corpus, arguments.lines_per_chunk, arguments.tei_directory)
+count = writeAnnotations(annotateChunks(chunks, automaton), arguments.output)
+print("Wrote " + str(count) + " annotations to " + arguments.output + ".")
@@ -0,0 +1,34 @@
+import sys
+import os
+cwd = os.getcwd()
+dir_for_working_code = os.path.join(cwd, 'working-code')
+sys.path.append(os.path.abspath(dir_for_working_code))
+from ToDosLogger import *
+from helper_functions import *
+from annotation_list_creation_utilities import *
+from cltk_based_text_processing import lemmatizeWords, getDeclensionTable
+from token_cache import readDirectoryAsTokens
+# ------------------------------------------------------------------------------
+# Declines all lemmata of the corpus in advance, so the interactive
+# create_list_of_content_words.py only has to look them up.
+# Usage: python3 build_declension_table.py [--rebuild]
+# ------------------------------------------------------------------------------
+
+declension_table = getDeclensionTable()
+if "--rebuild" in sys.argv:
+    print("Removing all lemmata from the declension table...")
+    declension_table.clear()
+
+corpus = readDirectoryAsTokens("corpus")
+# all the types the interactive loop might ask about (plus the known content words)
+types = set(cleanCorpus(list(set(corpus))))
+types.update(getContentWordsDict().keys())
+types = sorted(types)
+
+print("Lemmatizing " + str(len(types)) + " types...")
+normalized_types = [normalizeWord(t) for t in types]
+lemmas = [getLemmaStrippedOfMarker(lemma) for lemma in lemmatizeWords(normalized_types)]
+
+added = declension_table.build(lemmas)
+print("Added " + str(added) + " lemmata to the declension table (version " \
+  + declension_table.getVersion() + ").")
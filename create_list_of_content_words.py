@@ -1,51 +1,150 @@
 import sys
 import os
+import atexit # to save the pipeline snapshot when the session ends
 cwd = os.getcwd()
 dir_for_working_code = os.path.join(cwd, 'working-code')
 sys.path.append(os.path.abspath(dir_for_working_code))
+from startup_report import markStartupPhase, printStartupReport # imported first, to time the other imports
 from ToDosLogger import *
 from helper_functions import *
 from annotation_list_creation_utilities import *
-logger = ToDosLogger(LOG_FILE)
+from token_cache import readDirectoryAsTokens
+from WordListStore import WordListStore
+from pipeline_snapshot import getPipelineFingerprint, readPipelineSnapshot, writePipelineSnapshot
+from batch_decisions import runBatchDecisions, DECISION_RULES_FILE
+
+# number of processes used for tokenizing the corpus files:
+# None = one per CPU core, 1 = no parallelism (see the __main__ guard below)
+TOKENIZER_WORKERS = None
+# the bow is updated incrementally after every decision;
+# set this to check it against a full rebuild every 40 decisions
+CHECK_BOW_CONSISTENCY = False
+# decisions are journaled as they happen, the word lists are
+# only rewritten every this many decisions (and when quitting)
+CHECKPOINT_EVERY = 400
+# keep stopwords and content words in word_lists.sqlite instead of the .txt files
+# (which are imported the first time and exported when quitting), see manage_word_lists.py
+USE_WORD_LIST_DATABASE = False
+# also read the TEI editions in this directory (e.g. "corpus/rest"), instead of
+# the OCR'd `.txt` files of the same texts (see TEI_REPLACES in helper_functions)
+TEI_DIRECTORY = None
+# suggest the nearest content word or stopword for every type, so [a] can decide
+# it together with all its (OCR or spelling) variants in the bow
+SUGGEST_VARIANTS = True
+# decide all types the rules in this file match in one batch before prompting
+# (see batch_decisions.py for the rules), None = prompt for every type
+DECISION_RULES = DECISION_RULES_FILE
+# only apply the rules and write the word lists, without prompting for the rest
+BATCH_ONLY = False
+# lemmatize and decline this many of the next bow items in the background
+# while waiting for an answer, 0 = only when answering
+PREFETCH_AHEAD = 20
+# write the progress statistics to this HTML file (it reloads itself, keep it open
+# in a browser) every 40 decisions, None = only print them
+PROGRESS_REPORT_FILE = "progress.html"
 # ------------------------------------------------------------------------------
 
-corpus = readDirectoryAsCorpus("corpus")
-#corpus = readOneWordPerLineFileAsList("reduced_corpus.txt")
-#normalized = removeHyphensAndPunctuation(corpus)
-top = corpus[0:4000]
-#corpus = top # TODO remove later
+# the pool of TOKENIZER_WORKERS imports this script again in every worker process
+# (where processes are spawned, e.g. on macOS and Windows), so nothing may run then
+if __name__ == "__main__":
+    logger = ToDosLogger(LOG_FILE)
+    markStartupPhase("imports")
 
-STOP_WORDS_LIST = getStopwords()
-content_words = getContentWordsDict()
+    store = None
+    if USE_WORD_LIST_DATABASE:
+        store = WordListStore()
+        if store.isEmpty():
+            store.importStopwordsFile("stop_word_list.txt")
+            store.importContentWordsFile("content_words.txt")
+    STOP_WORDS_LIST = getStopwordIndex(getStopwords(store))
+    content_words = getContentWordsDict(store)
+    # decisions from a session that was interrupted before writing the word lists
+    resumeFromJournal(STOP_WORDS_LIST, content_words)
+    journal = DecisionJournal(JOURNAL_FILE)
+    markStartupPhase("word lists")
 
-bow_dict, reduced_corpus = updateBagOfWordsFromString(corpus, STOP_WORDS_LIST, content_words)
-#bow_dict, reduced_corpus = updateBagOfWordsFromString(" ".join(corpus), STOP_WORDS_LIST, content_words)
-#bow_dict, reduced_corpus = updateBagOfWordsFromDictFile(corpus, STOP_WORDS_LIST, content_words)
+    # if neither the corpus nor the word lists changed since the last session ended,
+    # the bow and reduced corpus are loaded from its snapshot instead of being computed again
+    fingerprint = getPipelineFingerprint("corpus", STOP_WORDS_LIST, content_words, TEI_DIRECTORY)
+    snapshot = readPipelineSnapshot(fingerprint)
+    if snapshot is not None:
+        bow_dict, reduced_corpus = snapshot
+        corpus = reduced_corpus # only used for the progress info when quitting
+    else:
+        # only files which are new or changed since the last run get tokenized again
+        corpus = readDirectoryAsTokens("corpus", workers=TOKENIZER_WORKERS, tei_directory=TEI_DIRECTORY)
+        #corpus = list(readDirectoryAsDocuments("corpus", tei_directory=TEI_DIRECTORY)) # without the token cache
+        #corpus = readOneWordPerLineFileAsList("reduced_corpus.txt")
+        #normalized = removeHyphensAndPunctuation(corpus)
+        bow_dict, reduced_corpus = updateBagOfWordsFromTokens(corpus, STOP_WORDS_LIST, content_words)
+        #bow_dict, reduced_corpus = updateBagOfWordsFromString(corpus, STOP_WORDS_LIST, content_words)
+        #bow_dict, reduced_corpus = updateBagOfWordsFromString(" ".join(corpus), STOP_WORDS_LIST, content_words)
+        #bow_dict, reduced_corpus = updateBagOfWordsFromDictFile(corpus, STOP_WORDS_LIST, content_words)
 
-bowProcessingInfo()
-# ------------------------------------------------------------------------------
+    # decided types are removed from this (and the bow) right away, see processOneBOWItem
+    reduced_corpus = ReducedCorpus(reduced_corpus, normalizeWord)
+    # updated from the types removed from reduced_corpus, see informAboutCurrentProgress
+    statistics = ProgressStatistics(reduced_corpus, bow_dict, STOP_WORDS_LIST, PROGRESS_REPORT_FILE)
+    variant_index = buildVariantIndex(bow_dict, content_words, STOP_WORDS_LIST) if SUGGEST_VARIANTS else None
+    markStartupPhase("bag of words")
 
-iteration_count = len(bow_dict)
+    if DECISION_RULES is not None:
+        content_words, rule_decisions = runBatchDecisions(bow_dict, content_words, STOP_WORDS_LIST, reduced_corpus, journal, variant_index, DECISION_RULES)
+        if rule_decisions > 0: # otherwise the word lists haven't changed
+            checkpointDecisions(journal, STOP_WORDS_LIST, content_words, store)
+        markStartupPhase("decision rules")
 
-while iteration_count > 40:
-    for i in range(40):
-        bow_dict, content_words, STOP_WORDS_LIST = processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST)
-        iteration_count -= 1
-    # vllt könnte man die update-FN überhaupt auskommentieren
-    bow_dict, reduced_corpus = updateBagOfWordsFromList(reduced_corpus, STOP_WORDS_LIST, content_words)
-    writeListAsOneWordPerLineFile(reduced_corpus, "reduced_corpus.txt")
-    # bis hierher
-    informAboutCurrentProgress(bow_dict,  " ".join(reduced_corpus))
+    # when the session ends (also via [q]), save the current state for the next start
+    def saveSnapshotOnExit():
+        writePipelineSnapshot(getPipelineFingerprint("corpus", STOP_WORDS_LIST, content_words, TEI_DIRECTORY), bow_dict, reduced_corpus)
+    atexit.register(saveSnapshotOnExit)
 
-# ------------------------------------------------------------------------------
-print("\n---\nLast 40!\n---\n")
-last_items = len(bow_dict)
-while last_items:
-    bow_dict, content_words, STOP_WORDS_LIST = processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST)
-    last_items -= 1
-bow_dict, reduced_corpus =  updateBagOfWordsFromList(reduced_corpus, STOP_WORDS_LIST, content_words)
-informAboutCurrentProgress(bow_dict,  " ".join(reduced_corpus))
-# ------------------------------------------------------------------------------
+    printStartupReport()
+    if BATCH_ONLY:
+        informAboutCurrentProgress(bow_dict, reduced_corpus, statistics)
+        quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words, journal, store)
+        quit()
+    bowProcessingInfo()
+    prefetcher = BOWPrefetcher(precomputeDecisionWork, PREFETCH_AHEAD) if PREFETCH_AHEAD else None
+    # ------------------------------------------------------------------------------
 
-printMostFrequentContentWords(content_words)
-quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words)
+    iteration_count = len(bow_dict)
+    decision_count = 0
+
+    while iteration_count > 40:
+        for i in range(40):
+            if not bow_dict:
+                break
+            bow_dict, content_words, STOP_WORDS_LIST = processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST, reduced_corpus, journal, store, variant_index, prefetcher, statistics)
+            decision_count += 1
+            if decision_count % CHECKPOINT_EVERY == 0:
+                checkpointDecisions(journal, STOP_WORDS_LIST, content_words, store)
+        # one decision can remove several types from the bow
+        iteration_count = len(bow_dict)
+        # vllt könnte man die update-FN überhaupt auskommentieren
+        #bow_dict, reduced_corpus = updateBagOfWordsFromList(reduced_corpus, STOP_WORDS_LIST, content_words)
+        if CHECK_BOW_CONSISTENCY:
+            checkBagOfWordsConsistency(bow_dict, reduced_corpus, STOP_WORDS_LIST, content_words)
+        #writeListAsOneWordPerLineFile(reduced_corpus, "reduced_corpus.txt") # now only at the end
+        # bis hierher
+        informAboutCurrentProgress(bow_dict, reduced_corpus, statistics)
+
+    # ------------------------------------------------------------------------------
+    print("\n---\nLast 40!\n---\n")
+    last_items = len(bow_dict)
+    while last_items and bow_dict:
+        bow_dict, content_words, STOP_WORDS_LIST = processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST, reduced_corpus, journal, store, variant_index, prefetcher, statistics)
+        last_items -= 1
+        decision_count += 1
+        if decision_count % CHECKPOINT_EVERY == 0:
+            checkpointDecisions(journal, STOP_WORDS_LIST, content_words, store)
+    if CHECK_BOW_CONSISTENCY:
+        checkBagOfWordsConsistency(bow_dict, reduced_corpus, STOP_WORDS_LIST, content_words)
+    informAboutCurrentProgress(bow_dict, reduced_corpus, statistics)
+    # ------------------------------------------------------------------------------
+
+    writeListAsOneWordPerLineFile(reduced_corpus, "reduced_corpus.txt")
+    printMostFrequentContentWords(content_words)
+    if prefetcher is not None:
+        prefetcher.close()
+    quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words, journal, store)
@@ -0,0 +1,32 @@
+import sys
+import os
+import argparse
+cwd = os.getcwd()
+dir_for_working_code = os.path.join(cwd, 'working-code')
+sys.path.append(os.path.abspath(dir_for_working_code))
+from KWICIndex import KWICIndex, getKWICIndexPath
+from annotation_list_creation_utilities import readOneWordPerLineFileAsContentWordDict
+from rdf_export import exportContentWordsAsRDF, RDF_EXPORT_DIRECTORY, RDF_EXPORT_FILE
+# ------------------------------------------------------------------------------
+# Precomputes RDF (SKOS concepts as N-Triples) from content_words.txt and the
+# occurrences of the forms in the corpus (see kwic.py). Only lemmata which changed
+# since the last export are written again.
+# ------------------------------------------------------------------------------
+
+parser = argparse.ArgumentParser(description="Write the content words and their occurrences as N-Triples.")
+parser.add_argument("--output-directory", default=RDF_EXPORT_DIRECTORY)
+parser.add_argument("--corpus", default="corpus")
+parser.add_argument("--tei-directory", default=None, help="also index the TEI files in this directory")
+parser.add_argument("--no-occurrences", action="store_true", help="only write the lemmata and their forms")
+arguments = parser.parse_args()
+
+content_words = readOneWordPerLineFileAsContentWordDict("content_words.txt")
+index = None
+if not arguments.no_occurrences:
+    index = KWICIndex(getKWICIndexPath(arguments.corpus))
+    index.update(arguments.corpus, arguments.tei_directory)
+written = exportContentWordsAsRDF(content_words, index, arguments.output_directory)
+print("Wrote " + str(written) + " changed shards, the RDF is in " \
+  + os.path.join(arguments.output_directory, RDF_EXPORT_FILE) + ".")
+if index is not None:
+    index.close()
@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+import argparse
+cwd = os.getcwd()
+dir_for_working_code = os.path.join(cwd, 'working-code')
+sys.path.append(os.path.abspath(dir_for_working_code))
+from KWICIndex import KWICIndex, getKWICIndexPath, formatKWICLine
+from annotation_list_creation_utilities import readOneWordPerLineFileAsContentWordDict, getFormsOfLemmataWithForm
+# ------------------------------------------------------------------------------
+# Prints keywords in context (KWICs) for a lemma of content_words.txt,
+# using the positional index of the corpus (corpus_index.sqlite, updated if the corpus changed).
+#   python3 kwic.py aqua
+#   python3 kwic.py --form aquam --width 60
+# ------------------------------------------------------------------------------
+
+parser = argparse.ArgumentParser(description="Show all contexts of a lemma (all its forms) in the corpus.")
+parser.add_argument("words", nargs="+", help="lemmata from content_words.txt (or forms, with --form)")
+parser.add_argument("--form", action="store_true", help="look up the forms themselves, not the lemmata")
+parser.add_argument("--width", type=int, default=40, help="characters of context on each side")
+parser.add_argument("--exact", action="store_true", help="only match the forms as written (not normalized)")
+parser.add_argument("--corpus", default="corpus")
+parser.add_argument("--tei-directory", default=None, help="also index the TEI files in this directory")
+parser.add_argument("--no-update", action="store_true", help="don't check the corpus for changes first")
+arguments = parser.parse_args()
+
+if arguments.form:
+    forms = arguments.words
+else:
+    content_words = readOneWordPerLineFileAsContentWordDict("content_words.txt")
+    forms = []
+    for word in arguments.words:
+        if word in content_words:
+            forms += content_words[word][1]
+        else: # maybe it's a form of a lemma
+            forms += getFormsOfLemmataWithForm(word, content_words)
+    if not forms:
+        sys.exit("Not in content_words.txt: " + " ".join(arguments.words))
+
+index = KWICIndex(getKWICIndexPath(arguments.corpus))
+if not arguments.no_update:
+    index.update(arguments.corpus, arguments.tei_directory)
+start = time.perf_counter()
+kwic_lines = index.concordance(forms, arguments.width, not arguments.exact)
+milliseconds = (time.perf_counter() - start) * 1000
+for kwic_line in kwic_lines:
+    print(formatKWICLine(kwic_line, arguments.width))
+print("\n" + str(len(kwic_lines)) + " hits for " + " ".join(sorted(set(forms))) + " (" + "%.1f" % milliseconds + " ms)")
+index.close()
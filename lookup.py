@@ -0,0 +1,99 @@
+import sys
+import os
+import argparse
+import socketserver # for the long-running mode
+cwd = os.getcwd()
+dir_for_working_code = os.path.join(cwd, 'working-code')
+sys.path.append(os.path.abspath(dir_for_working_code))
+from LookupTable import LookupTable, LOOKUP_TABLE_FILE
+# ------------------------------------------------------------------------------
+# Looks up content words in lookup_table.bin (built from content_words.txt):
+#   python3 lookup.py build
+#   python3 lookup.py query aquis "p:aqu" "l:aqua"
+#   python3 lookup.py repl
+#   python3 lookup.py serve --port 8765    (then e.g. `nc localhost 8765`)
+# A query is a form, "l:<lemma>" for a lemma or "p:<prefix>" for completions
+# (of forms and lemmata), all of them normalized like normalizeWord does.
+# ------------------------------------------------------------------------------
+
+def answerQuery(table, query):
+    """
+    Returns the answer to one query as text (see above for the kinds of queries).
+    """
+    query = query.strip()
+    if query.startswith("p:"):
+        completions = table.complete(query[2:])
+        completions += table.complete(query[2:], 'lemmas')
+        if not completions:
+            return "no completions"
+        return "\n".join(key + ": " + value for key, value in completions)
+    if query.startswith("l:"):
+        lemmata = table.findLemmas(query[2:])
+        if not lemmata:
+            return query[2:] + ": not a content word"
+        answers = []
+        for lemma in lemmata:
+            word_count, forms = table.lemma(lemma)
+            answers.append(lemma + " (" + word_count + "): " + " ".join(forms))
+        return "\n".join(answers)
+    lemmas = table.lemmasForForm(query)
+    return query + ": " + (" ".join(lemmas) if lemmas else "not a content word")
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Answers one query per line, every answer is followed by an empty line.
+    """
+    def handle(self):
+        for line in self.rfile:
+            query = line.decode('utf-8').strip()
+            if query:
+                self.wfile.write((answerQuery(self.server.table, query) + "\n\n").encode('utf-8'))
+
+parser = argparse.ArgumentParser(description="Look up content words by form, lemma or prefix.")
+parser.add_argument("--table", default=LOOKUP_TABLE_FILE)
+commands = parser.add_subparsers(dest="command", required=True)
+commands.add_parser("build", help="build the lookup table from content_words.txt")
+query = commands.add_parser("query", help="answer the given queries")
+query.add_argument("queries", nargs="+")
+commands.add_parser("repl", help="answer queries typed in, until an empty line or Ctrl-D")
+serve = commands.add_parser("serve", help="answer queries on a local socket, one per line")
+serve.add_argument("--port", type=int, default=8765)
+arguments = parser.parse_args()
+
+if arguments.command == "build":
+    # only building needs the content words and normalizeWord
+    from helper_functions import normalizeWord
+    from annotation_list_creation_utilities import readOneWordPerLineFileAsContentWordDict
+    from LookupTable import buildLookupTable
+    content_words = readOneWordPerLineFileAsContentWordDict("content_words.txt")
+    form_count = buildLookupTable(content_words, normalizeWord, arguments.table)
+    print("Built " + arguments.table + " with " + str(len(content_words)) + " lemmata and " + str(form_count) + " forms.")
+    sys.exit()
+
+if not os.path.exists(arguments.table):
+    sys.exit(arguments.table + " doesn't exist yet, run `python3 lookup.py build` first.")
+if os.path.exists("content_words.txt") and os.path.getmtime("content_words.txt") > os.path.getmtime(arguments.table):
+    print("[WARNING] content_words.txt changed since the lookup table was built, run `python3 lookup.py build`.")
+table = LookupTable(arguments.table)
+if arguments.command == "query":
+    for query in arguments.queries:
+        print(answerQuery(table, query))
+elif arguments.command == "repl":
+    while True:
+        try:
+            query = input("> ")
+        except EOFError: # Ctrl-D
+            print()
+            break
+        if not query.strip():
+            break
+        print(answerQuery(table, query))
+elif arguments.command == "serve":
+    with socketserver.ThreadingTCPServer(("localhost", arguments.port), QueryHandler) as server:
+        server.table = table
+        print("Answering queries on localhost:" + str(arguments.port) + ", Ctrl-C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+table.close()
@@ -0,0 +1,45 @@
+import sys
+import os
+import argparse
+cwd = os.getcwd()
+dir_for_working_code = os.path.join(cwd, 'working-code')
+sys.path.append(os.path.abspath(dir_for_working_code))
+from WordListStore import WordListStore, WORD_LIST_DATABASE
+# ------------------------------------------------------------------------------
+# Maintains word_lists.sqlite, the database version of stop_word_list.txt and
+# content_words.txt (see USE_WORD_LIST_DATABASE in create_list_of_content_words.py).
+# ------------------------------------------------------------------------------
+
+parser = argparse.ArgumentParser(description="Manage the stopword and content word database.")
+parser.add_argument("--database", default=WORD_LIST_DATABASE)
+commands = parser.add_subparsers(dest="command", required=True)
+commands.add_parser("import", help="replace the database contents with the .txt files (e.g. after fixing them by hand)")
+commands.add_parser("export", help="write the database contents to the .txt files")
+rename = commands.add_parser("rename", help="move all forms of a wrong lemma to the right one")
+rename.add_argument("old_lemma")
+rename.add_argument("new_lemma")
+delete = commands.add_parser("delete", help="remove a lemma and its forms")
+delete.add_argument("lemma")
+form = commands.add_parser("form", help="show which lemmata a form belongs to")
+form.add_argument("form")
+arguments = parser.parse_args()
+if arguments.command == "rename" and arguments.old_lemma == arguments.new_lemma:
+    parser.error("old_lemma and new_lemma are the same")
+
+store = WordListStore(arguments.database)
+if arguments.command == "import":
+    print("Imported " + str(store.importStopwordsFile("stop_word_list.txt")) + " stopwords and " \
+      + str(store.importContentWordsFile("content_words.txt")) + " content words.")
+elif arguments.command == "export":
+    print("Exported " + str(store.exportStopwordsFile("stop_word_list.txt")) + " stopwords and " \
+      + str(store.exportContentWordsFile("content_words.txt")) + " content words.")
+elif arguments.command == "rename":
+    store.renameLemma(arguments.old_lemma, arguments.new_lemma)
+    print(arguments.old_lemma + " -> " + arguments.new_lemma)
+elif arguments.command == "delete":
+    store.deleteLemma(arguments.lemma)
+elif arguments.command == "form":
+    lemmas = store.lemmasForForm(arguments.form)
+    print(arguments.form + ": " + (" ".join(lemmas) if lemmas else "not a content word") \
+      + (" (stopword)" if store.isStopword(arguments.form) else ""))
+store.close()
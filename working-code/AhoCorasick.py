@@ -0,0 +1,97 @@
+from collections import deque
+
+class AhoCorasick:
+    """
+    An Aho-Corasick automaton: finds all occurrences of many patterns
+    in a single pass over a text, however many patterns there are.
+
+    Patterns are added with a value (e.g. their lemma) and then compiled with build.
+    The text is fed one character at a time (see step), so it can be streamed
+    and every character only has to be looked at once.
+    """
+    def __init__(self):
+        self.goto = [{}] # state -> {character: next state}; state 0 is the root
+        self.fail = [0]
+        self.values = [None] # state -> values of the pattern ending in this state
+        self.depth = [0] # state -> length of the pattern (prefix) it stands for
+        self.output_link = [0] # state -> next state (via fail links) a pattern ends in, 0 if none
+        self.built = False
+
+    def add(self, pattern, value):
+        if not pattern:
+            return
+        state = 0
+        for character in pattern:
+            next_state = self.goto[state].get(character)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][character] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.values.append(None)
+                self.depth.append(self.depth[state] + 1)
+                self.output_link.append(0)
+            state = next_state
+        if self.values[state] is None:
+            self.values[state] = []
+        if value not in self.values[state]:
+            self.values[state].append(value)
+        self.built = False
+
+    def build(self):
+        """
+        Computes the fail links breadth first. Has to be called after adding the patterns.
+        """
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and character not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(character, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                fail_state = self.fail[next_state]
+                self.output_link[next_state] = fail_state if self.values[fail_state] is not None else self.output_link[fail_state]
+                queue.append(next_state)
+        self.built = True
+
+    def step(self, state, character):
+        """
+        Returns the state after reading character in state.
+        """
+        goto = self.goto
+        while True:
+            next_state = goto[state].get(character)
+            if next_state is not None:
+                return next_state
+            if not state:
+                return 0
+            state = self.fail[state]
+
+    def matches(self, state):
+        """
+        Yields (pattern length, values) of every pattern ending in state, longest first.
+        """
+        if self.values[state] is None:
+            state = self.output_link[state]
+        while state:
+            yield self.depth[state], self.values[state]
+            state = self.output_link[state]
+
+    def iterateMatches(self, text):
+        """
+        Yields (start, end, values) of all (possibly overlapping) pattern occurrences in text.
+        """
+        if not self.built:
+            self.build()
+        state = 0
+        for index, character in enumerate(text):
+            state = self.step(state, character)
+            for length, values in self.matches(state):
+                yield index + 1 - length, index + 1, values
+
+    def __len__(self):
+        return len(self.goto)
@@ -0,0 +1,50 @@
+import queue
+import threading
+
+class BOWPrefetcher:
+    """
+    Does the slow part of the next decisions (lemmatizing and declining, see
+    precomputeDecisionWork) for the most frequent bow items in a background thread,
+    while the prompt waits for the current answer.
+
+    The results end up in the LemmatizationService and the DeclensionTable
+    (both can be used from more than one thread), so answering only looks them up.
+    A thread and not a process, since those caches are in this process's memory;
+    the prompt waiting for input doesn't hold the GIL.
+    Every word is only prefetched once per session.
+    """
+    def __init__(self, prepare_word, lookahead=20):
+        self.prepare_word = prepare_word
+        self.lookahead = lookahead
+        self.requested = set()
+        self.closed = False
+        self.words = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True) # never keeps the script from quitting
+        self.thread.start()
+
+    def prefetch(self, bow_dict):
+        """
+        Queues the lookahead most frequent items of the bow (a BOWPriorityQueue), most frequent first.
+        """
+        for word, count in bow_dict.topItems(self.lookahead):
+            if word not in self.requested:
+                self.requested.add(word)
+                self.words.put(word)
+
+    def run(self):
+        while True:
+            word = self.words.get()
+            if word is None or self.closed:
+                break
+            try:
+                self.prepare_word(word)
+            except Exception:
+                pass # the answer will do the same again and report the error then
+
+    def close(self):
+        """
+        Stops the thread after the word it's working on, dropping the queued ones.
+        """
+        self.closed = True
+        self.words.put(None)
+        self.thread.join()
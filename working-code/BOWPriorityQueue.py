@@ -0,0 +1,115 @@
+import heapq # for getting the most frequent item without sorting the whole bow
+
+class BOWPriorityQueue:
+    """
+    The bag of words (type -> count) as an indexed max priority queue.
+
+    Works like the bow dict wherever that was used (`bow[key]`, `key in bow`,
+    `bow.pop(key)`, `len(bow)`, ...), but peekMax/popMax return the most frequent
+    item in O(log n) instead of sorting the whole bow every time.
+    Of several items with the same count, the one added first comes first
+    (same as `sorted(bow, key=bow.get, reverse=True)[0]`).
+
+    Changed or removed items leave outdated entries in the heap, which are skipped
+    (and cleaned up once there are too many of them).
+    """
+    def __init__(self, counts=None):
+        self.counts = {}
+        self.order = {} # key -> number of its insertion, to break ties
+        self.next_order = 0
+        self.heap = []
+        if counts:
+            for key, count in counts.items():
+                self.counts[key] = count
+                self.order[key] = self.next_order
+                self.next_order += 1
+            self.rebuildHeap()
+
+    def rebuildHeap(self):
+        self.heap = [(-count, self.order[key], key) for key, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def isCurrent(self, entry):
+        negative_count, order, key = entry
+        return self.order.get(key) == order and self.counts[key] == -negative_count
+
+    def __setitem__(self, key, count):
+        if key not in self.counts:
+            self.order[key] = self.next_order
+            self.next_order += 1
+        elif self.counts[key] == count:
+            return
+        self.counts[key] = count
+        heapq.heappush(self.heap, (-count, self.order[key], key))
+        if len(self.heap) > 2 * len(self.counts) + 64:
+            self.rebuildHeap()
+
+    def updateCount(self, key, count):
+        self[key] = count
+
+    def __getitem__(self, key):
+        return self.counts[key]
+
+    def get(self, key, default=None):
+        return self.counts.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def keys(self):
+        return self.counts.keys()
+
+    def values(self):
+        return self.counts.values()
+
+    def items(self):
+        return self.counts.items()
+
+    def pop(self, key, *default):
+        """
+        Removes an item by key (its heap entry is skipped from now on).
+        """
+        if key not in self.counts and default:
+            return default[0]
+        del self.order[key]
+        return self.counts.pop(key)
+
+    def peekMax(self):
+        """
+        Returns (key, count) of the most frequent item without removing it.
+        """
+        while self.heap and not self.isCurrent(self.heap[0]):
+            heapq.heappop(self.heap)
+        if not self.heap:
+            raise KeyError("peekMax(): bag of words is empty")
+        negative_count, order, key = self.heap[0]
+        return key, -negative_count
+
+    def popMax(self):
+        """
+        Removes and returns (key, count) of the most frequent item.
+        """
+        key, count = self.peekMax()
+        self.pop(key)
+        return key, count
+
+    def topItems(self, n):
+        """
+        Returns the n most frequent items as a list of (key, count), without removing them.
+        """
+        top = []
+        current_entries = []
+        while len(top) < n and self.heap:
+            entry = heapq.heappop(self.heap)
+            if self.isCurrent(entry) and entry not in current_entries: # an item can have duplicate entries
+                current_entries.append(entry)
+                top.append((entry[2], -entry[0]))
+        for entry in current_entries:
+            heapq.heappush(self.heap, entry)
+        return top
@@ -0,0 +1,104 @@
+
+class ContentWordDict(dict):
+    """
+    The content words dict (lemma -> [word_count, list_of_forms]) plus a reverse
+    index from every form to the lemmata it belongs to.
+
+    The index is updated whenever an entry is set or deleted (through any of the
+    dict methods which change entries), so code like
+    `content_words[lemma] = [count, forms]` (as in createNewEntryInContentWordDict
+    and addToContentWordEntry) keeps it current without any extra calls.
+    If a normalizer function is given (e.g. normalizeWord), the normalized
+    forms are indexed too, see lemmasForNormalizedForm.
+    """
+    def __init__(self, entries=None, normalizer=None):
+        super().__init__()
+        self.normalizer = normalizer
+        self.form_index = {} # form -> {lemma: None}, i.e. an ordered set of lemmata
+        self.normalized_index = {} # normalized form -> {lemma: None}
+        self.indexed_forms = {} # lemma -> forms it was indexed with (for unindexing)
+        if entries:
+            for lemma, value in entries.items():
+                self[lemma] = value
+
+    def __setitem__(self, lemma, value):
+        if lemma in self.indexed_forms:
+            self.unindexEntry(lemma)
+        super().__setitem__(lemma, value)
+        self.indexEntry(lemma)
+
+    def __delitem__(self, lemma):
+        self.unindexEntry(lemma)
+        super().__delitem__(lemma)
+
+    def pop(self, lemma, *default):
+        if lemma in self:
+            self.unindexEntry(lemma)
+        return super().pop(lemma, *default)
+
+    def popitem(self):
+        lemma, value = super().popitem()
+        self.unindexEntry(lemma)
+        return lemma, value
+
+    def clear(self):
+        super().clear()
+        self.form_index = {}
+        self.normalized_index = {}
+        self.indexed_forms = {}
+
+    def setdefault(self, lemma, default=None):
+        if lemma not in self:
+            self[lemma] = default
+        return self[lemma]
+
+    def update(self, *args, **kwargs):
+        for lemma, value in dict(*args, **kwargs).items():
+            self[lemma] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def indexEntry(self, lemma):
+        forms = [form for form in self[lemma][1] if form]
+        normalized_forms = []
+        for form in forms:
+            self.form_index.setdefault(form, {})[lemma] = None
+        if self.normalizer is not None:
+            normalized_forms = [self.normalizer(form) for form in forms]
+            for normalized in normalized_forms:
+                self.normalized_index.setdefault(normalized, {})[lemma] = None
+        self.indexed_forms[lemma] = (forms, normalized_forms)
+
+    def unindexEntry(self, lemma):
+        forms, normalized_forms = self.indexed_forms.pop(lemma)
+        for index, keys in ((self.form_index, forms), (self.normalized_index, normalized_forms)):
+            for key in keys:
+                lemmata = index.get(key)
+                if lemmata is None:
+                    continue
+                lemmata.pop(lemma, None)
+                if not lemmata:
+                    del index[key]
+
+    def containsForm(self, form):
+        return form in self.form_index
+
+    def lemmasForForm(self, form):
+        """
+        Returns the lemmata which have exactly this form (in the order they were added).
+        """
+        return list(self.form_index.get(form, ()))
+
+    def lemmasForNormalizedForm(self, form):
+        """
+        Returns the lemmata which have the normalized version of this form,
+        either as it was found or as the normalized version of one of their forms.
+        """
+        if self.normalizer is None:
+            return self.lemmasForForm(form)
+        normalized = self.normalizer(form)
+        lemmata = dict(self.form_index.get(normalized, {}))
+        lemmata.update(self.normalized_index.get(normalized, {}))
+        return list(lemmata)
@@ -0,0 +1,69 @@
+import os
+
+JOURNAL_FILE = 'decision_journal.txt'
+
+class DecisionJournal:
+    """
+    An append-only log of every stop/keep decision, one tab-separated line each:
+
+        stop    <word>  <forms added to the stopwords>
+        content <word>  <lemma>  <word count>  <forms of the lemma>
+
+    Every line is flushed right away (so a Ctrl-C loses nothing),
+    but only fsync'ed every fsync_every lines to keep the prompt fast.
+    The stopword and content word files only need to be written at checkpoints,
+    after which the journal is cleared (see checkpointDecisions).
+    """
+    def __init__(self, journal_file=JOURNAL_FILE, fsync_every=20):
+        self.journal_file = journal_file
+        self.fsync_every = fsync_every
+        self.unsynced = 0
+        self.file = open(journal_file, "a", encoding="utf-8")
+
+    def write(self, fields):
+        self.file.write("\t".join(fields) + "\n")
+        self.file.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def recordStop(self, word, forms):
+        self.write(["stop", word, " ".join(forms)])
+
+    def recordContent(self, word, lemma, content_word_entry):
+        word_count, forms = content_word_entry
+        self.write(["content", word, lemma, str(word_count), " ".join(forms)])
+
+    def clear(self):
+        """
+        Empties the journal, to be called once its decisions are written to the word lists.
+        """
+        self.file.truncate(0)
+        self.sync()
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+# ------------------------------------------------------------------------------
+def readJournal(journal_file=JOURNAL_FILE):
+    """
+    Yields the decisions of a journal as lists of fields (see DecisionJournal).
+    A last line that was only written halfway is skipped.
+    """
+    if not os.path.exists(journal_file):
+        return
+    with open(journal_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            fields = line[:-1].split("\t")
+            if fields[0] == "stop" and len(fields) == 3:
+                yield fields
+            elif fields[0] == "content" and len(fields) == 5:
+                yield fields
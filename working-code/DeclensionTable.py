@@ -0,0 +1,101 @@
+import sqlite3 # for the persistent lemma -> declined forms table
+import threading
+
+from tqdm import tqdm # to display a progress bar
+
+DECLENSION_TABLE_FILE = 'declension_table.sqlite'
+# bump this if the decliner changes, so the table gets rebuilt
+DECLENSION_TABLE_VERSION = '1'
+
+class DeclensionTable:
+    """
+    A persistent table of lemma -> all forms Collatinus declines it to.
+
+    Lemmata Collatinus can't decline are stored as well (with forms = NULL),
+    so they aren't tried again either. Unknown lemmata are declined on the fly
+    and added to the table; build_declension_table.py fills it in advance.
+    The lists of forms never contain empty strings, so callers needn't filter them.
+    Can be used from more than one thread.
+    """
+    def __init__(self, table_file=DECLENSION_TABLE_FILE):
+        self.decliner = None # created on first use
+        self.declined = {} # lemma -> list of forms, or None if it couldn't be declined
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(table_file, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS declensions (lemma TEXT PRIMARY KEY, forms TEXT)")
+        if self.getVersion() != DECLENSION_TABLE_VERSION:
+            self.clear()
+        self.connection.commit()
+
+    def getVersion(self):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def clear(self):
+        self.declined = {}
+        self.connection.execute("DELETE FROM declensions")
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (DECLENSION_TABLE_VERSION,))
+        self.connection.commit()
+
+    def getDecliner(self):
+        if self.decliner is None:
+            from cltk.stem.latin.declension import CollatinusDecliner # only imported when really needed
+            self.decliner = CollatinusDecliner()
+        return self.decliner
+
+    def declineWithCollatinus(self, lemma):
+        try:
+            declined_forms = self.getDecliner().decline(lemma, flatten=True)
+        except Exception:
+            return None
+        return [form for form in dict.fromkeys(declined_forms) if form] # unique, but keeps the order
+
+    def lookup(self, lemma):
+        """
+        Returns (found, forms) without declining anything: found is False if the lemma
+        isn't in the table yet, forms is None if it can't be declined.
+        An empty list of forms is stored as "", which is read back as [] again.
+        """
+        if lemma in self.declined:
+            return True, self.declined[lemma]
+        row = self.connection.execute("SELECT forms FROM declensions WHERE lemma = ?", (lemma,)).fetchone()
+        if row is None:
+            return False, None
+        forms = row[0].split() if row[0] is not None else None
+        self.declined[lemma] = forms
+        return True, forms
+
+    def store(self, declensions):
+        self.declined.update(declensions)
+        rows = [(lemma, " ".join(forms) if forms is not None else None) for lemma, forms in declensions.items()]
+        self.connection.executemany("INSERT OR REPLACE INTO declensions VALUES (?, ?)", rows)
+        self.connection.commit()
+
+    def getDeclinedForms(self, lemma):
+        """
+        Returns the list of declined forms of a lemma, or None if Collatinus can't decline it.
+        """
+        with self.lock:
+            found, forms = self.lookup(lemma)
+            if not found:
+                forms = self.declineWithCollatinus(lemma)
+                self.store({lemma: forms})
+            return forms
+
+    def build(self, lemmas):
+        """
+        Declines all lemmata which aren't in the table yet and stores them in one go.
+        Returns the number of lemmata which were added.
+        """
+        with self.lock:
+            new_lemmas = [l for l in dict.fromkeys(lemmas) if l and not self.lookup(l)[0]]
+            lemma_items = tqdm(new_lemmas)
+            lemma_items.set_description("Declining lemmata")
+            declensions = {lemma: self.declineWithCollatinus(lemma) for lemma in lemma_items}
+            self.store(declensions)
+            return len(declensions)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,81 @@
+import re
+import unicodedata # for removing ligatures and diacritics
+
+# non-standard glyphs (in the HAB transcriptions) which Unicode normalization doesn't turn into ASCII;
+# add new ones here (or pass an extended table to GlyphNormalizer)
+GLYPH_MAP = {
+    'Æ': 'AE',
+    'æ': 'ae',
+    'ß': 'ss',
+    'œ': 'oe',
+    'Œ': 'OE',
+    'ƒ': 'f',
+    'o̅': 'on', # o with combining overline
+    'ſ': 's',
+}
+
+# what CLTK's JVReplacer does
+JV_MAP = {'j': 'i', 'v': 'u', 'J': 'I', 'V': 'U'}
+
+class TranslationTable(dict):
+    """
+    A str.translate table which works out the replacement of a character the first time
+    it's seen, so it doesn't have to list every character of Unicode in advance.
+    """
+    def __init__(self, translate_character):
+        super().__init__()
+        self.translate_character = translate_character
+
+    def __missing__(self, codepoint):
+        replacement = self.translate_character(chr(codepoint))
+        self[codepoint] = replacement
+        return replacement
+
+class GlyphNormalizer:
+    """
+    Replaces non-standard glyphs, ligatures and long s, removes everything that isn't ASCII
+    after NFKD normalization (i.e. diacritics) and optionally does the j/v replacement and lowercasing
+    - all in one str.translate pass, for single words as well as whole documents.
+
+    Gives the same results as the replacements followed by unicodedata.normalize('NFKD', ...)
+    and the ASCII encoding did before. Pure ASCII strings skip the table
+    (or only use the j/v and lowercase part of it).
+    Glyphs of more than one character (like 'o̅') are replaced beforehand, but only if they can occur.
+    """
+    def __init__(self, glyph_map=GLYPH_MAP, replace_jv=False, lowercase=False):
+        self.glyph_map = {glyph: replacement for glyph, replacement in glyph_map.items() if len(glyph) == 1}
+        multi_character_glyphs = [glyph for glyph in glyph_map if len(glyph) > 1]
+        self.multi_character_map = {glyph: glyph_map[glyph] for glyph in multi_character_glyphs}
+        self.multi_character_pattern = None
+        if multi_character_glyphs:
+            # longest first, so the longest glyph wins
+            alternatives = sorted(multi_character_glyphs, key=len, reverse=True)
+            self.multi_character_pattern = re.compile("|".join(re.escape(glyph) for glyph in alternatives))
+        # the multi-character glyphs can only be in strings with their last character
+        self.multi_character_triggers = {glyph[-1] for glyph in multi_character_glyphs}
+        self.replace_jv = replace_jv
+        self.lowercase = lowercase
+        self.table = TranslationTable(self.translateCharacter)
+        self.ascii_table = {ord(c): self.finishASCII(c) for c in map(chr, range(128)) if self.finishASCII(c) != c}
+
+    def finishASCII(self, ascii_string):
+        if self.replace_jv:
+            ascii_string = "".join(JV_MAP.get(c, c) for c in ascii_string)
+        if self.lowercase:
+            ascii_string = ascii_string.lower()
+        return ascii_string
+
+    def translateCharacter(self, character):
+        character = self.glyph_map.get(character, character)
+        ascii_string = unicodedata.normalize('NFKD', character).encode('ascii', 'ignore').decode('ascii')
+        return self.finishASCII(ascii_string)
+
+    def normalize(self, text):
+        if text.isascii():
+            return text.translate(self.ascii_table) if self.ascii_table else text
+        if self.multi_character_pattern is not None and any(c in text for c in self.multi_character_triggers):
+            text = self.multi_character_pattern.sub(lambda match: self.multi_character_map[match.group()], text)
+        return text.translate(self.table)
+
+    def __call__(self, text):
+        return self.normalize(text)
@@ -0,0 +1,184 @@
+import hashlib
+import sqlite3 # for the index persisted next to the corpus
+from collections import namedtuple
+
+import regex as re # sudo -H python3 -m pip install regex
+from tqdm import tqdm # to display a progress bar
+
+from helper_functions import readCorpusFileAsChunks, getCorpusFiles, normalizeWord
+from token_cache import getFileHash
+
+# the index of the "corpus" directory is "corpus_index.sqlite"
+KWIC_INDEX_SUFFIX = '_index.sqlite'
+# words as they appear in the text; a word hyphenated at the end of a line ('-\n') counts as one.
+# This is not the pipeline's tokenization (see KWICIndex), which can't give character offsets
+WORD_PATTERN = re.compile(r'\w+(?:-\n\w+)*')
+
+# one line of a concordance: where the keyword is and the text around it
+KWICLine = namedtuple('KWICLine', ['source', 'line', 'left', 'keyword', 'right'])
+
+class KWICIndex:
+    """
+    A positional inverted index of the corpus: type -> (document, token offset, character span, line),
+    persisted in SQLite together with the text of every document, so keywords in context (KWICs)
+    can be looked up without reading or scanning the corpus.
+
+    A document is one CorpusChunk (a whole `.txt` file, or one page of a TEI file).
+    Types are the words as they appear in the text and are matched by their normalizeWord form,
+    so e.g. 'Aquæ' is found for the form 'aquae'. update only re-indexes new or changed files.
+
+    The words are found with WORD_PATTERN, not with the tokenization the bow is made from
+    (removeHyphensAndPunctuation, then CLTK's WordTokenizer): that one deletes characters
+    before tokenizing and splits enclitics off, so its tokens have no positions in the text.
+    The two can disagree - e.g. 'aquamque' is one word here but 'aqua' + '-que' in the bow,
+    a hyphen within a line joins two words in the bow but not here, and the bow's types
+    of fewer than 3 characters are indexed here as well - so a bow type or content word
+    form isn't always found as it is.
+    """
+    def __init__(self, index_file):
+        self.connection = sqlite3.connect(index_file)
+        self.documents = {} # doc_id -> (source, first_line, text), filled when needed
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS docs (doc_id INTEGER PRIMARY KEY, "
+              "path TEXT NOT NULL, source TEXT NOT NULL, first_line INTEGER NOT NULL, text TEXT NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS docs_by_path ON docs (path)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS types "
+              "(type_id INTEGER PRIMARY KEY, type TEXT NOT NULL UNIQUE, normalized TEXT NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS types_by_normalized ON types (normalized)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS postings (type_id INTEGER NOT NULL, "
+              "doc_id INTEGER NOT NULL, token INTEGER NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, "
+              "line INTEGER NOT NULL, "
+              "PRIMARY KEY (type_id, doc_id, token)) WITHOUT ROWID")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS postings_by_doc ON postings (doc_id)")
+        self.type_ids = dict(self.connection.execute("SELECT type, type_id FROM types"))
+
+    # --------------------------------------------------------------------------
+    # building
+    # --------------------------------------------------------------------------
+    def getTypeId(self, word):
+        type_id = self.type_ids.get(word)
+        if type_id is None:
+            cursor = self.connection.execute("INSERT INTO types (type, normalized) VALUES (?, ?)",
+              (word, normalizeWord(word.replace("-\n", ""))))
+            type_id = cursor.lastrowid
+            self.type_ids[word] = type_id
+        return type_id
+
+    def removeFile(self, path):
+        doc_ids = [(row[0],) for row in self.connection.execute("SELECT doc_id FROM docs WHERE path = ?", (path,))]
+        self.connection.executemany("DELETE FROM postings WHERE doc_id = ?", doc_ids)
+        self.connection.execute("DELETE FROM docs WHERE path = ?", (path,))
+        self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        for (doc_id,) in doc_ids:
+            self.documents.pop(doc_id, None)
+
+    def iteratePostings(self, doc_id, chunk):
+        line = chunk.first_line
+        last_start = 0
+        for token, match in enumerate(WORD_PATTERN.finditer(chunk.text)):
+            line += chunk.text.count("\n", last_start, match.start())
+            last_start = match.start()
+            yield self.getTypeId(match.group()), doc_id, token, match.start(), match.end(), line
+
+    def indexFile(self, path, file_hash):
+        self.removeFile(path)
+        for chunk in readCorpusFileAsChunks(path):
+            cursor = self.connection.execute("INSERT INTO docs (path, source, first_line, text) VALUES (?, ?, ?, ?)",
+              (path, chunk.source, chunk.first_line, chunk.text))
+            doc_id = cursor.lastrowid
+            self.connection.executemany("INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)",
+              self.iteratePostings(doc_id, chunk))
+        self.connection.execute("INSERT INTO files VALUES (?, ?)", (path, file_hash))
+
+    def update(self, corpus_directory, tei_directory=None):
+        """
+        Indexes the corpus files (see getCorpusFiles) which are new or changed since the last update
+        and removes the ones which are gone. Returns the number of files which were (re-)indexed.
+        """
+        indexed = dict(self.connection.execute("SELECT path, hash FROM files"))
+        corpus_files = getCorpusFiles(corpus_directory, tei_directory)
+        file_hashes = {path: getFileHash(path) for path in corpus_files}
+        changed = [path for path in corpus_files if indexed.get(path) != file_hashes[path]]
+        with self.connection:
+            for path in set(indexed) - set(corpus_files):
+                self.removeFile(path)
+            files = tqdm(changed)
+            for path in files:
+                files.set_description("Indexing %s" % path)
+                self.indexFile(path, file_hashes[path])
+        return len(changed)
+
+    # --------------------------------------------------------------------------
+    # querying
+    # --------------------------------------------------------------------------
+    def getDocument(self, doc_id):
+        if doc_id not in self.documents:
+            self.documents[doc_id] = self.connection.execute(
+              "SELECT source, first_line, text FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        return self.documents[doc_id]
+
+    def findPostings(self, forms, match_normalized=True):
+        """
+        Returns (doc_id, token, start, end, line) of every occurrence of the forms, in corpus order.
+        """
+        column = "normalized" if match_normalized else "type"
+        forms = list(dict.fromkeys(normalizeWord(f) if match_normalized else f for f in forms if f))
+        postings = []
+        for start in range(0, len(forms), 500): # sqlite only accepts a limited number of parameters
+            part = forms[start:start + 500]
+            postings += self.connection.execute("SELECT p.doc_id, p.token, p.start, p.end, p.line FROM types t "
+              "JOIN postings p ON p.type_id = t.type_id WHERE t." + column + " IN (" + ",".join("?" * len(part)) + ")",
+              part).fetchall()
+        postings.sort()
+        return postings
+
+    def findOccurrences(self, forms, match_normalized=True):
+        """
+        Like findPostings, but returns (source, line, start, end) without loading the document texts.
+        """
+        column = "normalized" if match_normalized else "type"
+        forms = list(dict.fromkeys(normalizeWord(f) if match_normalized else f for f in forms if f))
+        occurrences = []
+        for start in range(0, len(forms), 500):
+            part = forms[start:start + 500]
+            occurrences += self.connection.execute("SELECT p.doc_id, p.token, d.source, p.line, p.start, p.end FROM types t "
+              "JOIN postings p ON p.type_id = t.type_id JOIN docs d ON d.doc_id = p.doc_id WHERE t." + column \
+              + " IN (" + ",".join("?" * len(part)) + ")", part).fetchall()
+        occurrences.sort()
+        return [occurrence[2:] for occurrence in occurrences]
+
+    def getFingerprint(self):
+        """
+        Returns a hash of the indexed corpus files, which changes whenever update re-indexed something.
+        """
+        fingerprint = hashlib.sha1()
+        for path, file_hash in self.connection.execute("SELECT path, hash FROM files ORDER BY path"):
+            fingerprint.update((path + " " + file_hash + "\n").encode('utf-8'))
+        return fingerprint.hexdigest()
+
+    def concordance(self, forms, width=40, match_normalized=True):
+        """
+        Returns a KWICLine for every occurrence of the forms, with width characters
+        of context on each side (line breaks shown as spaces).
+        """
+        lines = []
+        for doc_id, token, start, end, line in self.findPostings(forms, match_normalized):
+            source, first_line, text = self.getDocument(doc_id)
+            left = text[max(0, start - width):start].replace("\n", " ")
+            right = text[end:end + width].replace("\n", " ")
+            keyword = text[start:end].replace("-\n", "")
+            lines.append(KWICLine(source, line, left, keyword, right))
+        return lines
+
+    def close(self):
+        self.connection.close()
+
+# ------------------------------------------------------------------------------
+def getKWICIndexPath(corpus_directory):
+    return corpus_directory.rstrip("/") + KWIC_INDEX_SUFFIX
+
+# ------------------------------------------------------------------------------
+def formatKWICLine(kwic_line, width=40):
+    return kwic_line.left.rjust(width) + " [" + kwic_line.keyword + "] " + kwic_line.right.ljust(width) \
+      + "  " + kwic_line.source + ":" + str(kwic_line.line)
@@ -0,0 +1,66 @@
+import sqlite3 # for the lemma cache shared between sessions
+import threading
+
+LEMMA_CACHE_FILE = 'lemma_cache.sqlite'
+# bump this if the lemmatizer changes, so old results aren't used anymore
+LEMMA_CACHE_VERSION = '1'
+
+class LemmatizationService:
+    """
+    Holds one long-lived CLTK LemmaReplacer and remembers every result,
+    in memory and in an SQLite file, so no word is ever lemmatized twice - not even across sessions.
+
+    Words that aren't known yet are passed to the lemmatizer in one batch (as a list).
+    Since the words are single tokens already, this gives the same lemma as passing them one by one.
+    Can be used from more than one thread.
+    """
+    def __init__(self, cache_file=LEMMA_CACHE_FILE):
+        self.lemmatizer = None # created on first use
+        self.lemmas = {}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS lemmas (form TEXT PRIMARY KEY, lemma TEXT NOT NULL)")
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != LEMMA_CACHE_VERSION:
+            self.connection.execute("DELETE FROM lemmas")
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (LEMMA_CACHE_VERSION,))
+        self.connection.commit()
+
+    def getLemmatizer(self):
+        if self.lemmatizer is None:
+            from cltk.stem.lemma import LemmaReplacer # only imported when really needed
+            self.lemmatizer = LemmaReplacer('latin')
+        return self.lemmatizer
+
+    def readCachedLemmas(self, words):
+        # sqlite only accepts a limited number of parameters per query
+        for start in range(0, len(words), 500):
+            part = words[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            rows = self.connection.execute("SELECT form, lemma FROM lemmas WHERE form IN (" + placeholders + ")", part)
+            self.lemmas.update(rows)
+
+    def lemmatizeWords(self, words):
+        """
+        Returns the lemma of each word in the list (in the same order).
+        """
+        with self.lock:
+            missing = list({w for w in words if w not in self.lemmas})
+            if missing:
+                self.readCachedLemmas(missing)
+                missing = [w for w in missing if w not in self.lemmas and w]
+            if missing:
+                results = self.getLemmatizer().lemmatize(missing)
+                new_lemmas = list(zip(missing, results))
+                self.lemmas.update(new_lemmas)
+                self.connection.executemany("INSERT OR REPLACE INTO lemmas VALUES (?, ?)", new_lemmas)
+                self.connection.commit()
+            return [self.lemmas.get(w, '') for w in words]
+
+    def lemmatize(self, word):
+        return self.lemmatizeWords([word])[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,158 @@
+import mmap # the table is used straight from the file, nothing is loaded at start
+import os
+import struct
+
+from GlyphNormalizer import GlyphNormalizer
+
+LOOKUP_TABLE_FILE = 'lookup_table.bin'
+# bump this if the file layout changes
+LOOKUP_TABLE_MAGIC = b'LKT2'
+# magic, then number of records and position of the offsets of the forms, lemmata and normalized lemmata sections
+HEADER = struct.Struct('<4sQQQQQQ')
+OFFSET = struct.Struct('<Q')
+SEPARATOR = b'\x1f'
+
+class LookupTable:
+    """
+    A memory-mapped lookup table of the content words, built from content_words.txt
+    (see buildLookupTable), for looking up lemmata by surface form, by lemma and by prefix.
+
+    The file has three sections of records sorted by key (as UTF-8 bytes):
+        forms:      normalized form -> lemmata it's a form of
+        lemmas:     lemma -> word count and forms
+        normalized: normalized lemma -> lemmata (for finding lemmata by their normalized form)
+    Each section is found through an array of record offsets, so every lookup is a
+    binary search in the mapped file and opening the table doesn't read anything.
+    Forms, lemmata and prefixes are looked up normalized like normalizeWord does
+    (except for lemma, which takes the exact lemma).
+    """
+    def __init__(self, table_file=LOOKUP_TABLE_FILE):
+        self.file = open(table_file, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, forms_count, forms_offsets, lemmas_count, lemmas_offsets, normalized_count, normalized_offsets \
+          = HEADER.unpack_from(self.data, 0)
+        if magic != LOOKUP_TABLE_MAGIC:
+            raise ValueError(table_file + " is not a lookup table of this version, build it again")
+        self.sections = {'forms': (forms_count, forms_offsets), 'lemmas': (lemmas_count, lemmas_offsets),
+          'normalized': (normalized_count, normalized_offsets)}
+        self.normalizer = GlyphNormalizer(replace_jv=True, lowercase=True)
+
+    def getRecord(self, section, i):
+        count, offsets = self.sections[section]
+        start, end = struct.unpack_from('<QQ', self.data, offsets + i * OFFSET.size)
+        key, value = self.data[start:end].split(SEPARATOR, 1)
+        return key, value
+
+    def search(self, section, key):
+        """
+        Returns the index of the first record whose key is >= key (as bytes).
+        """
+        low, high = 0, self.sections[section][0]
+        while low < high:
+            middle = (low + high) // 2
+            if self.getRecord(section, middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get(self, section, key):
+        key = key.encode('utf-8')
+        i = self.search(section, key)
+        if i < self.sections[section][0]:
+            record_key, value = self.getRecord(section, i)
+            if record_key == key:
+                return value.decode('utf-8')
+        return None
+
+    def lemmasForForm(self, form):
+        value = self.get('forms', self.normalizer.normalize(form))
+        return value.split(" ") if value else []
+
+    def lemma(self, lemma):
+        """
+        Returns (word count, forms) of a lemma, or None if it's not a content word.
+        """
+        value = self.get('lemmas', lemma)
+        if value is None:
+            return None
+        word_count, forms = value.split(",", 1)
+        return word_count, forms.split(" ")
+
+    def findLemmas(self, lemma):
+        """
+        Returns the lemmata which are the same as lemma once normalized, lemma itself first.
+        """
+        value = self.get('normalized', self.normalizer.normalize(lemma))
+        lemmata = value.split(" ") if value else []
+        return sorted(lemmata, key=lambda found: found != lemma)
+
+    def complete(self, prefix, section='forms', limit=20):
+        """
+        Returns up to limit (key, value) pairs whose key starts with prefix, both normalized.
+        For the lemmas, the normalized lemmata are completed, but the pairs are (lemma, word count and forms).
+        """
+        search_section = 'normalized' if section == 'lemmas' else section
+        prefix = self.normalizer.normalize(prefix).encode('utf-8')
+        completions = []
+        i = self.search(search_section, prefix)
+        while i < self.sections[search_section][0] and len(completions) < limit:
+            key, value = self.getRecord(search_section, i)
+            if not key.startswith(prefix):
+                break
+            if section == 'lemmas':
+                completions += [(lemma, self.get('lemmas', lemma)) for lemma in value.decode('utf-8').split(" ")]
+            else:
+                completions.append((key.decode('utf-8'), value.decode('utf-8')))
+            i += 1
+        return completions[:limit]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+# ------------------------------------------------------------------------------
+def writeSection(f, records):
+    """
+    Writes the records (sorted (key, value) byte strings) followed by their offsets
+    and returns the position of the offsets.
+    """
+    offsets = []
+    for key, value in records:
+        offsets.append(f.tell())
+        f.write(key + SEPARATOR + value)
+    offsets.append(f.tell())
+    offsets_position = f.tell()
+    for offset in offsets:
+        f.write(OFFSET.pack(offset))
+    return offsets_position
+
+# ------------------------------------------------------------------------------
+def buildLookupTable(content_words, normalizer, table_file=LOOKUP_TABLE_FILE):
+    """
+    Builds the lookup table file from a content words dict (lemma -> [word count, forms]),
+    normalizing the forms and lemmata with normalizer (normalizeWord). Returns the number of forms.
+    """
+    lemmas_of_form = {}
+    lemmas_of_normalized = {}
+    for lemma, (word_count, forms) in content_words.items():
+        lemmas_of_normalized.setdefault(normalizer(lemma), []).append(lemma)
+        for form in forms:
+            if form:
+                lemmas_of_form.setdefault(normalizer(form), []).append(lemma)
+    form_records = sorted((form.encode('utf-8'), " ".join(dict.fromkeys(lemmas)).encode('utf-8'))
+      for form, lemmas in lemmas_of_form.items())
+    lemma_records = sorted((lemma.encode('utf-8'), (str(word_count) + "," + " ".join(f for f in forms if f)).encode('utf-8'))
+      for lemma, (word_count, forms) in content_words.items())
+    normalized_records = sorted((normalized.encode('utf-8'), " ".join(lemmas).encode('utf-8'))
+      for normalized, lemmas in lemmas_of_normalized.items())
+    with open(table_file + ".tmp", 'wb') as f:
+        f.write(b'\0' * HEADER.size) # filled in at the end
+        forms_offsets = writeSection(f, form_records)
+        lemmas_offsets = writeSection(f, lemma_records)
+        normalized_offsets = writeSection(f, normalized_records)
+        f.seek(0)
+        f.write(HEADER.pack(LOOKUP_TABLE_MAGIC, len(form_records), forms_offsets, len(lemma_records), lemmas_offsets,
+          len(normalized_records), normalized_offsets))
+    os.replace(table_file + ".tmp", table_file)
+    return len(form_records)
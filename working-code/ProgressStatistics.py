@@ -0,0 +1,101 @@
+import html # for the report
+import os
+
+from BOWPriorityQueue import BOWPriorityQueue
+
+# how many of the most frequent remaining types are shown
+TOP_TYPES_COUNT = 40
+
+class ProgressStatistics:
+    """
+    The statistics informAboutCurrentProgress prints, kept up to date as decisions are made
+    instead of being counted from the whole corpus every time.
+
+    Watches the reduced corpus (a ReducedCorpus): update only goes through the types removed
+    from it since the last update (its removal_log), so it costs O(changes). Removed tokens
+    count as covered by the stopwords if their type is one (STOP_WORDS_LIST, a StopwordIndex
+    which grows with the session), otherwise as covered by the content words.
+    All numbers are relative to the reduced corpus at the start of the session.
+    """
+    def __init__(self, corpus_index, bow_dict, STOP_WORDS_LIST=(), report_file=None):
+        self.corpus_index = corpus_index
+        self.STOP_WORDS_LIST = STOP_WORDS_LIST
+        self.report_file = report_file
+        self.start_tokens = len(corpus_index)
+        self.start_types = corpus_index.typeCount()
+        self.start_bow = len(bow_dict)
+        # remaining type -> number of tokens, for the most frequent ones (built by topTypes)
+        self.type_counts = None
+        self.log_position = len(corpus_index.removal_log)
+        self.stop_tokens = 0
+        self.stop_types = 0
+        self.content_tokens = 0
+        self.content_types = 0
+
+    def update(self):
+        removal_log = self.corpus_index.removal_log
+        for token_type, count in removal_log[self.log_position:]:
+            if self.type_counts is not None:
+                self.type_counts.pop(token_type, None)
+            if token_type in self.STOP_WORDS_LIST:
+                self.stop_tokens += count
+                self.stop_types += 1
+            else:
+                self.content_tokens += count
+                self.content_types += 1
+        self.log_position = len(removal_log)
+
+    def tokens(self):
+        return len(self.corpus_index)
+
+    def types(self):
+        return self.corpus_index.typeCount()
+
+    def getCoverage(self, tokens):
+        """
+        Returns the percentage of the tokens (at the start of the session) tokens are.
+        """
+        return 100 * tokens / self.start_tokens if self.start_tokens else 0.0
+
+    def topTypes(self, n=TOP_TYPES_COUNT):
+        if self.type_counts is None:
+            self.update()
+            types = self.corpus_index.types()
+            self.type_counts = BOWPriorityQueue(dict(zip(types, map(self.corpus_index.countOf, types))))
+        return self.type_counts.topItems(n)
+
+    def getSummary(self, bow_size):
+        """
+        Returns the statistics as lines of text.
+        """
+        return [
+          "Corpus has " + str(self.tokens()) + " words in total (TOKENS), with " + str(self.types()) \
+            + " distinct values (TYPES); " + str(self.start_tokens) + " and " + str(self.start_types) + " at the start.",
+          "Decided this session: " + str(self.stop_types) + " types as stopwords (%.1f%% of the tokens), " % self.getCoverage(self.stop_tokens) \
+            + str(self.content_types) + " as content words (%.1f%%)." % self.getCoverage(self.content_tokens),
+          "BOW: " + str(bow_size) + " of " + str(self.start_bow) + " types left.",
+        ]
+
+# ------------------------------------------------------------------------------
+def writeProgressReport(statistics, bow_size, file_path):
+    """
+    Writes the statistics and a bar chart of the most frequent remaining types as an HTML file
+    which reloads itself, so it can be kept open in a browser while deciding.
+    Written to a temporary file first, so the browser never shows half a report.
+    """
+    top_types = statistics.topTypes()
+    highest = max([count for token_type, count in top_types] + [1])
+    bars = []
+    for i, (token_type, count) in enumerate(top_types):
+        width = int(600 * count / highest)
+        bars.append('<text x="0" y="%i">%s</text><rect x="150" y="%i" width="%i" height="14" fill="steelblue"/><text x="%i" y="%i">%i</text>' \
+          % (i * 18 + 13, html.escape(token_type), i * 18, width, width + 155, i * 18 + 13, count))
+    with open(file_path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="10">'
+          + '<title>Progress</title></head><body style="font-family: sans-serif">\n')
+        for line in statistics.getSummary(bow_size):
+            f.write('<p>' + html.escape(line) + '</p>\n')
+        f.write('<h3>' + str(len(top_types)) + ' most common remaining types</h3>\n')
+        f.write('<svg width="800" height="%i" style="font-size: 12px">' % (len(top_types) * 18))
+        f.write("".join(bars) + '</svg>\n</body></html>\n')
+    os.replace(file_path + ".tmp", file_path)
@@ -0,0 +1,87 @@
+import numpy as np # sudo -H python3 -m pip install numpy
+
+from TokenArray import TokenArray
+
+class ReducedCorpus:
+    """
+    The reduced corpus (list of tokens) kept as a TokenArray, together with the number
+    of tokens of every type (a numpy bincount of the type ids), so all tokens of a type
+    can be removed without going through the whole corpus.
+
+    Removing a type only sets its count to 0; the ids themselves are never touched
+    (so they can stay memory-mapped, e.g. from the pipeline snapshot) and nothing per
+    token or per type is turned into a Python object when it's created. Iterating over it,
+    toList() or toTokenArray() give the remaining tokens in their original order.
+    If a normalizer function is given (e.g. normalizeWord), removeTypes can also
+    remove all types whose normalized form is one of the given words.
+    Every removal is logged as (type, number of tokens) in removal_log, so
+    others can follow the changes (see ProgressStatistics).
+    """
+    def __init__(self, tokens, normalizer=None):
+        self.token_array = TokenArray.fromTokens(tokens)
+        self.type_counts = self.token_array.bincount() # type id -> tokens left, 0 once removed
+        self.normalizer = normalizer
+        self.normalized_types = None # normalized -> {types}, built lazily in removeTypes
+        self.removed_tokens = 0
+        self.removal_log = []
+
+    def buildNormalizedTypes(self):
+        self.normalized_types = {}
+        for token_type in self.types():
+            self.normalized_types.setdefault(self.normalizer(token_type), set()).add(token_type)
+
+    def removeTypes(self, words, match_normalized=False):
+        """
+        Removes all tokens of the given types. With match_normalized, also those of types
+        whose normalized form is one of the given words (like removeContentFormsFromCorpus does).
+        Returns a dict of each removed type -> the number of its tokens which were removed.
+        """
+        types_to_remove = {w for w in words if w in self}
+        if match_normalized and self.normalizer is not None:
+            if self.normalized_types is None:
+                self.buildNormalizedTypes()
+            for word in words:
+                types_to_remove.update(self.normalized_types.get(word, ()))
+        removed = {}
+        for token_type in types_to_remove:
+            type_id = self.token_array.type_ids[token_type]
+            removed[token_type] = int(self.type_counts[type_id])
+            self.type_counts[type_id] = 0
+            if self.normalized_types is not None:
+                self.normalized_types[self.normalizer(token_type)].discard(token_type)
+        self.removed_tokens += sum(removed.values())
+        self.removal_log.extend(removed.items())
+        return removed
+
+    def countOf(self, token_type):
+        type_id = self.token_array.type_ids.get(token_type)
+        return int(self.type_counts[type_id]) if type_id is not None else 0
+
+    def types(self):
+        """
+        Returns the remaining types as a list (which takes O(types), see typeCount).
+        """
+        vocabulary = self.token_array.vocabulary
+        return [vocabulary[i] for i in np.flatnonzero(self.type_counts).tolist()]
+
+    def typeCount(self):
+        return int(np.count_nonzero(self.type_counts))
+
+    def __contains__(self, token_type):
+        return self.countOf(token_type) > 0
+
+    def __len__(self):
+        return len(self.token_array) - self.removed_tokens
+
+    def toTokenArray(self):
+        """
+        Returns the remaining tokens as a TokenArray (sharing the vocabulary).
+        """
+        ids = self.token_array.ids
+        return TokenArray(self.token_array.vocabulary, ids[self.type_counts[ids] > 0], self.token_array.type_ids)
+
+    def __iter__(self):
+        return iter(self.toTokenArray())
+
+    def toList(self):
+        return list(self)
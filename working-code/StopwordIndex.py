@@ -0,0 +1,52 @@
+
+class StopwordIndex:
+    """
+    Keeps the stopwords in a set for O(1) lookups while still remembering
+    the order they were added in (for writing them back to file).
+
+    Can be used wherever STOP_WORDS_LIST was a plain list: it can be iterated,
+    extended and checked with `in`. If a normalizer function is given
+    (e.g. normalizeWord), containsNormalized also finds words whose normalized
+    form is a normalized stopword. Those normalized forms are only computed
+    the first time they're needed and then kept up to date with every addition.
+    """
+    def __init__(self, stopwords=(), normalizer=None):
+        self.stopwords = []
+        self.stop_set = set()
+        self.normalizer = normalizer
+        self.normalized_set = None # built lazily in containsNormalized
+        self.extend(stopwords)
+
+    def add(self, word):
+        if not word or word in self.stop_set: # empty items are never stopwords
+            return
+        self.stopwords.append(word)
+        self.stop_set.add(word)
+        if self.normalized_set is not None:
+            self.normalized_set.add(self.normalizer(word))
+
+    def extend(self, words):
+        for word in words:
+            self.add(word)
+
+    def __iadd__(self, words):
+        self.extend(words)
+        return self
+
+    def __contains__(self, word):
+        return word in self.stop_set
+
+    def containsNormalized(self, word):
+        if word in self.stop_set:
+            return True
+        if self.normalizer is None:
+            return False
+        if self.normalized_set is None:
+            self.normalized_set = {self.normalizer(w) for w in self.stopwords}
+        return self.normalizer(word) in self.normalized_set
+
+    def __iter__(self):
+        return iter(self.stopwords)
+
+    def __len__(self):
+        return len(self.stopwords)
@@ -0,0 +1,180 @@
+import re
+from collections import deque
+from xml.parsers import expat # streaming parser, the document is never built in memory
+
+# elements whose text isn't part of the edition's text
+SKIP_ELEMENTS = {'teiHeader', 'figure'}
+# elements after which a word ends even if there's no whitespace in the file (e.g. </item><item>)
+BLOCK_ELEMENTS = {'div', 'head', 'p', 'list', 'item', 'table', 'row', 'cell', 'note', 'cb'}
+# characters which mark a word hyphenated at the end of a line
+LINE_END_HYPHENS = ('-', '¬', '⸗')
+BLOCK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'(\s+)')
+
+class LineCollector:
+    """
+    Collects the text of one page (or one note), one line per <lb/>.
+
+    Runs of whitespace become a single space. A word hyphenated at the end of a line
+    is joined and kept on the line it starts on, so line n of the text is still
+    line n of the page - only the rest of the word moves up.
+    """
+    def __init__(self, first_line):
+        self.first_line = first_line
+        self.lines = []
+        self.current = ""
+        self.joining = False # the rest of a hyphenated word is still to come
+        self.join_start = 0 # where the rest of the hyphenated word starts in current
+
+    def currentLineNumber(self):
+        return self.first_line + len(self.lines)
+
+    def endJoin(self):
+        self.joining = False
+        self.lines.append(self.current.strip())
+        self.current = ""
+
+    def addSpace(self):
+        if self.joining:
+            # whitespace before the rest of the word (e.g. indentation after <lb/>) is ignored
+            if len(self.current) > self.join_start:
+                self.endJoin()
+        elif self.current and not self.current.endswith(" "):
+            self.current += " "
+
+    def addText(self, text):
+        for piece in WHITESPACE.split(text):
+            if not piece:
+                continue
+            if piece.isspace():
+                self.addSpace()
+            else:
+                self.current += piece
+
+    def lineBreak(self):
+        if self.joining:
+            self.endJoin()
+        line = self.current.rstrip()
+        if line.endswith(LINE_END_HYPHENS) and len(line) > 1 and line[-2].isalpha():
+            self.current = line[:-1]
+            self.join_start = len(self.current)
+            self.joining = True
+        else:
+            self.lines.append(line.strip())
+            self.current = ""
+
+    def finish(self):
+        if self.joining:
+            self.endJoin()
+        elif self.current.strip():
+            self.lines.append(self.current.strip())
+        return "\n".join(self.lines).strip("\n")
+
+class TEIReader:
+    """
+    Streams the text of a TEI edition page by page, reading the file in blocks.
+
+    Iterating yields (page, first_line, text) with page being the facs reference of
+    the <pb/> (without '#', None before the first one) and the text having one line per <lb/>,
+    starting at line first_line of that page. Markup like <hi> is dropped, its text kept.
+    Marginal notes are yielded on their own, with first_line being the line they're next to.
+    A <pb/> inside a word (<w>) or in a hyphenated word only takes effect at the next
+    whitespace or line break, so words are never split between pages.
+    Only the current page is held in memory.
+    """
+    def __init__(self, file_path, skip_elements=SKIP_ELEMENTS, block_size=BLOCK_SIZE):
+        self.file_path = file_path
+        self.skip_elements = skip_elements
+        self.block_size = block_size
+
+    def __iter__(self):
+        self.finished_texts = deque()
+        self.page = None
+        self.page_text = LineCollector(1)
+        self.notes = [] # collectors of the (possibly nested) notes currently open
+        self.skip_depth = 0
+        self.word_depth = 0
+        self.pending_page = None # a <pb/> that has to wait for the end of a word
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self.startElement
+        parser.EndElementHandler = self.endElement
+        parser.CharacterDataHandler = self.characterData
+        with open(self.file_path, 'rb') as f:
+            for block in iter(lambda: f.read(self.block_size), b''):
+                parser.Parse(block, False)
+                while self.finished_texts:
+                    yield self.finished_texts.popleft()
+        parser.Parse(b'', True)
+        self.finishPage(None)
+        while self.finished_texts:
+            yield self.finished_texts.popleft()
+
+    def collector(self):
+        return self.notes[-1] if self.notes else self.page_text
+
+    def finishPage(self, next_page):
+        text = self.page_text.finish()
+        if text:
+            self.finished_texts.append((self.page, self.page_text.first_line, text))
+        self.page = next_page
+        self.page_text = LineCollector(1)
+
+    def checkPendingPage(self):
+        if self.pending_page is not None and not self.word_depth and not self.page_text.joining:
+            page, self.pending_page = self.pending_page, None
+            self.finishPage(page)
+
+    def startElement(self, name, attributes):
+        if self.skip_depth or name in self.skip_elements:
+            self.skip_depth += 1
+            return
+        if name == 'pb':
+            page = attributes.get('facs', attributes.get('n', '')).lstrip('#') or None
+            if self.word_depth or self.page_text.joining:
+                self.pending_page = page
+            else:
+                self.finishPage(page)
+        elif name == 'lb':
+            self.collector().lineBreak()
+            if not self.notes:
+                self.checkPendingPage()
+        elif name == 'w':
+            self.word_depth += 1
+        elif name == 'note':
+            self.collector().addSpace()
+            self.notes.append(LineCollector(self.page_text.currentLineNumber()))
+
+    def endElement(self, name):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if name == 'w':
+            self.word_depth -= 1
+        elif name == 'note':
+            note = self.notes.pop()
+            text = note.finish()
+            if text:
+                self.finished_texts.append((self.page, note.first_line, text))
+            return
+        if name in BLOCK_ELEMENTS:
+            self.collector().addSpace()
+            if not self.notes:
+                self.checkPendingPage()
+
+    def characterData(self, data):
+        if self.skip_depth:
+            return
+        if self.notes or self.pending_page is None:
+            self.collector().addText(data)
+            return
+        whitespace = WHITESPACE.search(data)
+        if whitespace is None or self.word_depth:
+            self.page_text.addText(data)
+            return
+        # the end of the word still belongs to the old page
+        self.page_text.addText(data[:whitespace.start()])
+        self.page_text.addSpace()
+        self.checkPendingPage()
+        self.page_text.addText(data[whitespace.start():])
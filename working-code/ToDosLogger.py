@@ -1,9 +1,9 @@
-import pandas as pd
 LOG_FILE = 'thesaurusMaker_logfile.txt'
 
 class ToDosLogger:
     def __init__(self, log_file):
-        self.logs_list = pd.DataFrame(columns=['ErrorType', 'warnInfoError','Message'])
+        # pandas is only imported when the logs are printed, not for every script that logs
+        self.logs_list = None
         self.log_file = log_file
 
     def addToLogger(self,error_type, warnInfoErr, message):
@@ -14,6 +14,9 @@ class ToDosLogger:
         file.close()
 
     def sortLoggerOutput(self):
+        if self.logs_list is None:
+            import pandas as pd
+            self.logs_list = pd.DataFrame(columns=['ErrorType', 'warnInfoError','Message'])
         self.logs_list.sort_values("ErrorType",inplace=True)
         log_file_name = self.log_file.split(".")[0]
         self.logs_list.to_csv(log_file_name + ".csv", index=False, header=False)
@@ -26,6 +29,7 @@ class ToDosLogger:
         print(subtable)
 
     def printLogs(self):
+        import pandas as pd
         self.logs_list = pd.read_csv(self.log_file,
             names=['ErrorType', 'warnInfoError','Message'])
         existing_error_types = self.logs_list["ErrorType"].unique().tolist()
@@ -0,0 +1,62 @@
+from collections import Counter
+
+import numpy as np # sudo -H python3 -m pip install numpy
+
+class TokenArray:
+    """
+    A compact list of tokens: a vocabulary (list of types) plus a numpy int32 array
+    of type ids, one per token.
+
+    Filtering (e.g. removing stopwords) decides once per type and then applies
+    a boolean mask to the ids, counting is done with numpy's bincount.
+    Filtered TokenArrays share the vocabulary of the one they came from.
+    Iterating over it gives the tokens as strings, so it can be used wherever
+    a list of tokens was used before.
+    """
+    def __init__(self, vocabulary, ids, type_ids=None):
+        self.vocabulary = vocabulary
+        self.ids = ids
+        if type_ids is None:
+            type_ids = {token_type: i for i, token_type in enumerate(vocabulary)}
+        self.type_ids = type_ids
+
+    @classmethod
+    def fromTokens(cls, tokens):
+        if isinstance(tokens, TokenArray):
+            return tokens
+        type_ids = {}
+        ids = np.fromiter((type_ids.setdefault(t, len(type_ids)) for t in tokens), dtype=np.int32)
+        return cls(list(type_ids), ids, type_ids)
+
+    def typeMask(self, predicate):
+        """
+        Returns a boolean array with predicate(type) for every type in the vocabulary.
+        """
+        return np.fromiter((predicate(t) for t in self.vocabulary), dtype=bool, count=len(self.vocabulary))
+
+    def filterTypes(self, keep):
+        """
+        Returns a new TokenArray with only the tokens whose type keep(type) is True for.
+        """
+        mask = self.typeMask(keep)
+        return TokenArray(self.vocabulary, self.ids[mask[self.ids]], self.type_ids)
+
+    def bincount(self):
+        return np.bincount(self.ids, minlength=len(self.vocabulary))
+
+    def counts(self):
+        """
+        Returns the token counts as a Counter (types in the order they first appeared).
+        """
+        type_counts = self.bincount()
+        return Counter({self.vocabulary[i]: int(type_counts[i]) for i in np.flatnonzero(type_counts)})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        vocabulary = self.vocabulary
+        return (vocabulary[i] for i in self.ids.tolist())
+
+    def toList(self):
+        return list(self)
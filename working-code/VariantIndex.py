@@ -0,0 +1,116 @@
+from collections import Counter
+
+class VariantIndex:
+    """
+    Finds the words within a small edit distance of a word (OCR and spelling variants
+    like 'Hervibus' for 'Heroibus') without comparing it to every word.
+
+    Every word is indexed by its character trigrams (padded with '#'). One edit removes
+    at most 4 of a word's trigrams (3, or 4 when swapping two characters), so a word
+    within distance d shares all but 4 * d of the trigrams of the query (and of its own);
+    only those candidates get their (optimal string alignment) distance computed.
+    (So words which share no trigram at all aren't found - see getMaxVariantDistance
+    for distances which are always found.)
+    Words are stored normalized (with normalizer, e.g. normalizeWord) together with
+    a list of values, e.g. what kind of word they are.
+    """
+    def __init__(self, normalizer=None, ngram_size=3):
+        self.normalizer = normalizer
+        self.ngram_size = ngram_size
+        self.words = [] # id -> normalized word
+        self.values = [] # id -> values added for the word
+        self.ngram_counts = [] # id -> number of distinct trigrams of the word
+        self.word_ids = {}
+        self.postings = {} # trigram -> ids of the words containing it
+
+    def normalize(self, word):
+        return self.normalizer(word) if self.normalizer is not None else word
+
+    def getNgrams(self, word):
+        padding = "#" * (self.ngram_size - 1)
+        padded = padding + word + padding
+        return {padded[i:i + self.ngram_size] for i in range(len(padded) - self.ngram_size + 1)}
+
+    def add(self, word, value):
+        word = self.normalize(word)
+        if not word:
+            return
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.words)
+            self.word_ids[word] = word_id
+            self.words.append(word)
+            self.values.append([])
+            ngrams = self.getNgrams(word)
+            self.ngram_counts.append(len(ngrams))
+            for ngram in ngrams:
+                self.postings.setdefault(ngram, []).append(word_id)
+        if value not in self.values[word_id]:
+            self.values[word_id].append(value)
+
+    def extend(self, words, value):
+        for word in words:
+            self.add(word, value)
+
+    def findSimilar(self, word, max_distance):
+        """
+        Returns (distance, normalized word, values) of all indexed words within
+        max_distance of word, nearest first.
+        """
+        word = self.normalize(word)
+        ngrams = self.getNgrams(word)
+        shared = Counter()
+        for ngram in ngrams:
+            shared.update(self.postings.get(ngram, ()))
+        results = []
+        for word_id, shared_count in shared.items():
+            candidate = self.words[word_id]
+            if abs(len(candidate) - len(word)) > max_distance:
+                continue
+            if shared_count < max(len(ngrams), self.ngram_counts[word_id]) - (self.ngram_size + 1) * max_distance:
+                continue
+            distance = getEditDistance(word, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((distance, candidate, self.values[word_id]))
+        results.sort(key=lambda result: (result[0], result[1]))
+        return results
+
+    def __len__(self):
+        return len(self.words)
+
+# ------------------------------------------------------------------------------
+def getMaxVariantDistance(word):
+    """
+    How many edits a variant of word may differ by: short words have too many
+    neighbours that are different words. Variants within this distance always
+    share a trigram with word, so VariantIndex finds all of them.
+    """
+    if len(word) < 3:
+        return 0
+    if len(word) < 7:
+        return 1
+    return 2
+
+# ------------------------------------------------------------------------------
+def getEditDistance(a, b, max_distance):
+    """
+    Optimal string alignment distance (Levenshtein plus swapping two neighbouring characters).
+    Returns max_distance + 1 as soon as the distance is known to be bigger than max_distance.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
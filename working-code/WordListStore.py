@@ -0,0 +1,155 @@
+import sqlite3 # for storing content words and stopwords in one indexed file
+
+WORD_LIST_DATABASE = 'word_lists.sqlite'
+
+class WordListStore:
+    """
+    Content words (lemma, word count, forms) and stopwords in an SQLite database.
+
+    Forms are stored once per lemma (no duplicates) and indexed, so finding
+    the lemmata of a form doesn't need the whole list in memory.
+    Content words can be loaded partially, all changes are done in transactions.
+    The `.txt` files (content_words.txt, stop_word_list.txt) can still be
+    imported and exported, e.g. to fix bad lemmata by hand and import them again.
+    """
+    def __init__(self, database_file=WORD_LIST_DATABASE):
+        self.connection = sqlite3.connect(database_file)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS lemmas "
+              "(lemma TEXT PRIMARY KEY, word_count INTEGER NOT NULL DEFAULT 0)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS forms "
+              "(form TEXT NOT NULL, lemma TEXT NOT NULL REFERENCES lemmas(lemma) ON DELETE CASCADE, "
+              "PRIMARY KEY (lemma, form))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS forms_by_form ON forms (form)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS stopwords (word TEXT PRIMARY KEY)")
+
+    # --------------------------------------------------------------------------
+    # content words
+    # --------------------------------------------------------------------------
+    def writeContentWordEntry(self, lemma, word_count, forms):
+        try:
+            word_count = int(word_count)
+        except ValueError:
+            word_count = 0
+        self.connection.execute("INSERT INTO lemmas VALUES (?, ?) ON CONFLICT(lemma) "
+          "DO UPDATE SET word_count = excluded.word_count", (lemma, word_count))
+        self.connection.execute("DELETE FROM forms WHERE lemma = ?", (lemma,))
+        self.connection.executemany("INSERT OR IGNORE INTO forms VALUES (?, ?)",
+          [(form, lemma) for form in forms if form])
+
+    def setContentWordEntry(self, lemma, word_count, forms):
+        with self.connection:
+            self.writeContentWordEntry(lemma, word_count, forms)
+
+    def saveContentWords(self, content_words):
+        """
+        Writes (adds or replaces) all entries of a content words dict in one transaction.
+        Lemmata which are only in the database are kept.
+        """
+        with self.connection:
+            for lemma, (word_count, forms) in content_words.items():
+                self.writeContentWordEntry(lemma, word_count, forms)
+
+    def loadContentWords(self, lemmas=None, content_words=None):
+        """
+        Loads the content words into content_words (by default a new dict),
+        only the given lemmata if lemmas is given.
+        """
+        if content_words is None:
+            content_words = {}
+        if lemmas is None:
+            rows = self.connection.execute("SELECT lemma, word_count FROM lemmas ORDER BY rowid")
+        else:
+            lemmas = list(lemmas)
+            rows = []
+            for start in range(0, len(lemmas), 500):
+                part = lemmas[start:start + 500]
+                rows += self.connection.execute("SELECT lemma, word_count FROM lemmas WHERE lemma IN (" \
+                  + ",".join("?" * len(part)) + ") ORDER BY rowid", part).fetchall()
+        for lemma, word_count in list(rows):
+            forms = [row[0] for row in self.connection.execute("SELECT form FROM forms WHERE lemma = ? ORDER BY rowid", (lemma,))]
+            content_words[lemma] = [word_count, forms]
+        return content_words
+
+    def lemmasForForm(self, form):
+        return [row[0] for row in self.connection.execute("SELECT lemma FROM forms WHERE form = ?", (form,))]
+
+    def renameLemma(self, old_lemma, new_lemma):
+        """
+        Fixes a wrong lemma: moves its forms and word count to new_lemma
+        (merging them if new_lemma already exists).
+        """
+        if old_lemma == new_lemma: # would double the word count and then delete the lemma
+            raise ValueError("Can't rename a lemma to itself: " + old_lemma)
+        with self.connection:
+            row = self.connection.execute("SELECT word_count FROM lemmas WHERE lemma = ?", (old_lemma,)).fetchone()
+            if row is None:
+                raise KeyError(old_lemma)
+            self.connection.execute("INSERT INTO lemmas VALUES (?, ?) ON CONFLICT(lemma) "
+              "DO UPDATE SET word_count = word_count + excluded.word_count", (new_lemma, row[0]))
+            self.connection.execute("INSERT OR IGNORE INTO forms SELECT form, ? FROM forms WHERE lemma = ?", (new_lemma, old_lemma))
+            self.connection.execute("DELETE FROM lemmas WHERE lemma = ?", (old_lemma,))
+
+    def deleteLemma(self, lemma):
+        with self.connection:
+            self.connection.execute("DELETE FROM lemmas WHERE lemma = ?", (lemma,))
+
+    def importContentWordsFile(self, file_path):
+        """
+        Replaces all content words with those of a content_words.txt file.
+        """
+        with open(file_path, 'r') as f:
+            lines = f.read().splitlines()
+        with self.connection:
+            self.connection.execute("DELETE FROM lemmas")
+            for line in lines:
+                items = line.split(",")
+                if len(items) < 3:
+                    continue
+                self.writeContentWordEntry(items[0], items[1], items[2].split(" "))
+        return len(lines)
+
+    def exportContentWordsFile(self, file_path):
+        content_words = self.loadContentWords()
+        with open(file_path, 'w') as f:
+            for lemma, (word_count, forms) in content_words.items():
+                f.write(lemma + "," + str(word_count) + "," + " ".join(forms) + "\n")
+        return len(content_words)
+
+    # --------------------------------------------------------------------------
+    # stopwords
+    # --------------------------------------------------------------------------
+    def addStopwords(self, words):
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO stopwords VALUES (?)", [(w,) for w in words if w])
+
+    def loadStopwords(self):
+        return [row[0] for row in self.connection.execute("SELECT word FROM stopwords ORDER BY rowid")]
+
+    def isStopword(self, word):
+        return self.connection.execute("SELECT 1 FROM stopwords WHERE word = ?", (word,)).fetchone() is not None
+
+    def importStopwordsFile(self, file_path):
+        """
+        Replaces all stopwords with those of a stop_word_list.txt file.
+        """
+        with open(file_path, 'r') as f:
+            words = f.read().splitlines()
+        with self.connection:
+            self.connection.execute("DELETE FROM stopwords")
+            self.connection.executemany("INSERT OR IGNORE INTO stopwords VALUES (?)", [(w,) for w in words if w])
+        return len(words)
+
+    def exportStopwordsFile(self, file_path):
+        words = self.loadStopwords()
+        with open(file_path, 'w') as f:
+            for word in words:
+                f.write(word + "\n")
+        return len(words)
+
+    def isEmpty(self):
+        return self.connection.execute("SELECT EXISTS (SELECT 1 FROM lemmas) OR EXISTS (SELECT 1 FROM stopwords)").fetchone()[0] == 0
+
+    def close(self):
+        self.connection.close()
@@ -3,17 +3,25 @@
 # Imports
 # ------------------------------------------------------------------------------
 
+import os
 from collections import Counter # for bow creation
 
 import regex as re # sudo -H python3 -m pip install regex
 from tqdm import tqdm # to display a progress bar
 
-from nltk.probability import FreqDist
-
 from ToDosLogger import *
+from ContentWordDict import ContentWordDict
+from BOWPriorityQueue import BOWPriorityQueue
+from TokenArray import TokenArray
+from DecisionJournal import DecisionJournal, readJournal, JOURNAL_FILE
+from ReducedCorpus import ReducedCorpus
+from VariantIndex import VariantIndex, getMaxVariantDistance
+from BOWPrefetcher import BOWPrefetcher
+from ProgressStatistics import ProgressStatistics, writeProgressReport
 from helper_functions import *
-from cltk_based_text_processing import lemmatizeWord, getLemmaStrippedOfMarker, tokenizeLatinWords
-from cltk.stem.latin.declension import CollatinusDecliner
+from cltk_based_text_processing import lemmatizeWord, getLemmaStrippedOfMarker, tokenizeLatinWords, declineLemma
+
+stops_logger = ToDosLogger(LOG_FILE)
 
 # ------------------------------------------------------------------------------
 def writeContentWordDictAsOneWordPerLineFile(content_words_dict, file_to_write_path):
@@ -26,7 +34,7 @@ def writeContentWordDictAsOneWordPerLineFile(content_words_dict, file_to_write_p
 
 # ------------------------------------------------------------------------------
 def readOneWordPerLineFileAsContentWordDict(file_path):
-    content_words_dict = {}
+    content_words_dict = ContentWordDict(normalizer=normalizeWord)
     with open(file_path,  'r+') as f: #TODO opens in read mode, better a+?
         lines = f.read().splitlines()
         for line in lines:
@@ -39,20 +47,42 @@ def readOneWordPerLineFileAsContentWordDict(file_path):
 
 
 # ------------------------------------------------------------------------------
-def informAboutCurrentProgress(bow_dict, corpus):
-    original_corpus_length_unique = getCorpusSize(corpus)
+def getContentWordIndex(content_words):
+    """
+    Makes sure the content words come with their form -> lemma index,
+    i.e. turns a plain dict into a ContentWordDict if necessary.
+    """
+    if isinstance(content_words, ContentWordDict):
+        return content_words
+    return ContentWordDict(content_words, normalizeWord)
+
+# ------------------------------------------------------------------------------
+def informAboutCurrentProgress(bow_dict, corpus, statistics=None):
+    """
+    Prints the progress statistics and, if the ProgressStatistics have a report_file,
+    writes them there as HTML (with the 40 most common remaining types) instead of plotting them.
+    Without ProgressStatistics, they are counted from the corpus (see iterateCorpusWords) first.
+    """
+    if statistics is None:
+        statistics = ProgressStatistics(ReducedCorpus(iterateCorpusWords(corpus)), bow_dict)
+    statistics.update()
     current_bow_size = len(bow_dict)
-    frequency_distribution = FreqDist(corpus.split())
-    frequency_distribution.plot(40,title='Frequency distribution for 40 most common tokens')
-    print("\nCorpus has [" + str(original_corpus_length_unique) + \
+    for line in statistics.getSummary(current_bow_size):
+        print(line)
+    if statistics.report_file is not None:
+        writeProgressReport(statistics, current_bow_size, statistics.report_file)
+    print("\nCorpus has [" + str(statistics.types()) + \
       "] unique values, of which [" + str(current_bow_size) + "] are still in the BOW to be processed.")
-    showProgressBar(original_corpus_length_unique, current_bow_size)
+    showProgressBar(statistics.types(), current_bow_size)
 
 # ------------------------------------------------------------------------------
-def getContentWordsDict():
+def getContentWordsDict(store=None):
     """
     A function to load content words from a txt file.
+    If a WordListStore is given, they are loaded from its database instead.
     """
+    if store is not None:
+        return store.loadContentWords(content_words=ContentWordDict(normalizer=normalizeWord))
     content_words = readOneWordPerLineFileAsContentWordDict("content_words.txt")
     # should create the file if it doesn't exist
     return content_words
@@ -99,32 +129,30 @@ def batchUpdateContentWordEntryWordCount(forms_added, bow_dict, content_words_di
 
 # ------------------------------------------------------------------------------
 def removeProcessedContentWordsFromBOW(tokens, content_words):
-    bow_dict_types_list = [value[1] for key, value in content_words.items()]
-    bow_types = []
-    for types_list in bow_dict_types_list:
-        bow_types += types_list
-    #print("-----------------> These strings are in the bow removal list..")
-    #print(bow_types)
-    bow_types = normalizeList(bow_types)
+    """
+    Removes the tokens of all types which are a content word form, or are one once
+    normalized (see removeContentFormsFromCorpus, which the decisions use as well).
+    Returns a TokenArray if tokens is one, otherwise a list.
+    """
+    content_forms = [form for word_count, forms in content_words.values() for form in forms]
 
     #print("\n---\nTokens before removal of content words: " + str(len(tokens)))
     #TODO code below is not actually worth it, only removed about 40 more items (in close to 3mio tokens)
     # bzw iwas kann da net ganz stimmen?
-    corpus_tokens = tqdm(tokens)
-    corpus_tokens.set_description("Removal of already processed content words")
-    tokens_without_normalized_content_words = [w for w in corpus_tokens if not normalizeWord(w) in bow_types]
-
-
-    corp_toks = tqdm(tokens_without_normalized_content_words)
-    corp_toks.set_description("Removal of already processed content words (normalized)")
-    tokens_without_content_words = [w for w in corp_toks if not w in bow_types]
+    # decide once per type (normalizing each type only once), then filter the tokens by type
+    corpus_index = ReducedCorpus(tokens, normalizeWord)
+    removeContentFormsFromCorpus(content_forms, corpus_index, {})
+    if isinstance(tokens, TokenArray):
+        return corpus_index.toTokenArray()
+    tokens_without_content_words = corpus_index.toList()
     print("After: " + str(len(tokens_without_content_words)))
     return tokens_without_content_words
 
 # ------------------------------------------------------------------------------
 def addItemToContentWordDictIfNotAlreadyIn(original_word, count_value, content_words, bow_dict):
-    finding = [key for key, value in content_words.items() if original_word in value[1]]
-    found_normalized = [key for key, value in content_words.items() if normalizeWord(original_word) in value[1]]
+    content_words = getContentWordIndex(content_words)
+    finding = content_words.lemmasForForm(original_word)
+    found_normalized = content_words.lemmasForNormalizedForm(original_word)
     #print(finding)
     #print(found_normalized)
     if finding:
@@ -150,14 +178,62 @@ def addItemToContentWordDictIfNotAlreadyIn(original_word, count_value, content_w
 
 
 # ------------------------------------------------------------------------------
-def quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words):
+def resumeFromJournal(STOP_WORDS_LIST, content_words, journal_file=JOURNAL_FILE):
+    """
+    Applies all decisions from the journal of an interrupted session
+    to the stopwords (a StopwordIndex) and the content words.
+    Returns the number of decisions restored.
+    """
+    decision_count = 0
+    for fields in readJournal(journal_file):
+        if fields[0] == "stop":
+            STOP_WORDS_LIST.extend(fields[2].split(" "))
+        else:
+            decision, word, lemma, word_count, forms = fields
+            content_words[lemma] = [int(word_count), forms.split(" ")]
+        decision_count += 1
+    if decision_count:
+        print("Restored " + str(decision_count) + " decisions from the last session's journal.")
+    return decision_count
+
+# ------------------------------------------------------------------------------
+def checkpointDecisions(journal, STOP_WORDS_LIST, content_words, store=None):
+    """
+    Writes the stopwords and content words to their files and clears the journal.
+
+    Both files are written to a temporary file first and then moved in place,
+    so an interruption never leaves half a list behind (the journal still has everything then).
+    If a WordListStore is given, they are saved in its database instead (in transactions).
+    """
+    if store is not None:
+        store.addStopwords(STOP_WORDS_LIST)
+        store.saveContentWords(content_words)
+        journal.clear()
+        return
+    updateStopwordList(STOP_WORDS_LIST, "stop_word_list.txt.tmp")
+    writeContentWordDictAsOneWordPerLineFile(content_words, "content_words.txt.tmp")
+    os.replace("stop_word_list.txt.tmp", "stop_word_list.txt")
+    os.replace("content_words.txt.tmp", "content_words.txt")
+    journal.clear()
+
+# ------------------------------------------------------------------------------
+def quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words, journal=None, store=None):
     # checking whether the list was actually permanently modified...
     #print("\n\nCurrent state of STOPS:")
     #print(" ".join(STOP_WORDS_LIST))
-    print("\n---\nWriting this new stopword list to file.")
-    updateStopwordList(STOP_WORDS_LIST)
-    print("Writing the current state of content words to file.")
-    writeContentWordDictAsOneWordPerLineFile(content_words, "content_words.txt")
+    print("\n---\nWriting this new stopword list and the current state of content words to file.")
+    if journal is not None:
+        checkpointDecisions(journal, STOP_WORDS_LIST, content_words, store)
+        journal.close()
+    elif store is not None:
+        store.addStopwords(STOP_WORDS_LIST)
+        store.saveContentWords(content_words)
+    else:
+        updateStopwordList(STOP_WORDS_LIST)
+        writeContentWordDictAsOneWordPerLineFile(content_words, "content_words.txt")
+    if store is not None: # keep the .txt files up to date as well
+        store.exportStopwordsFile("stop_word_list.txt")
+        store.exportContentWordsFile("content_words.txt")
     print("\n---\nBye for now!")
 
 # ------------------------------------------------------------------------------
@@ -172,38 +248,225 @@ def bowProcessingInfo():
     print("\n\n\n----------------")
     print("You will now be prompted to add items to the content words list.")
     print("Say [s/n/-] for STOPS or [k/y/+/ENTER] for KEEP.\n[q] to quit.")
-    print("If you keyboard-interrupt, all data will be lost.\n So please be sure to actually quit.")
+    print("If a type looks like a variant of a known word, [a] decides it and all its\n" \
+      + " variants in the bow the way that word was decided.")
+    print("Every decision is written to " + JOURNAL_FILE + " right away; if you keyboard-interrupt,\n" \
+      + " they will be restored the next time. Quitting writes them to the word lists.")
+
+# ------------------------------------------------------------------------------
+def removeDecidedFormsFromCorpus(forms, corpus_index, bow_dict, match_normalized=False):
+    """
+    Incremental update after a decision: removes all tokens of the given forms
+    from the reduced corpus (a ReducedCorpus) and their types from the bow.
+    Returns a dict of each removed type -> number of tokens removed.
+    """
+    removed = corpus_index.removeTypes(forms, match_normalized)
+    for token_type in removed:
+        if token_type in bow_dict:
+            bow_dict.pop(token_type)
+    return removed
+
+# ------------------------------------------------------------------------------
+def removeContentFormsFromCorpus(lemma_forms, corpus_index, bow_dict):
+    """
+    Incremental update after a content word decision: removes all tokens of the types which
+    are one of the lemma's forms, or are one once normalized (like removeProcessedContentWordsFromBOW),
+    from the reduced corpus and the bow. Every content word decision ([k], [a] and the rules) uses this.
+    Returns a dict of each removed type -> number of tokens removed.
+    """
+    content_forms = normalizeList(list(lemma_forms)) # a copy, without empty forms and duplicates
+    return removeDecidedFormsFromCorpus(content_forms, corpus_index, bow_dict, match_normalized=True)
+
+# ------------------------------------------------------------------------------
+def getFormsOfLemmataWithForm(word, content_words):
+    """
+    Returns all forms of all content word lemmata that have the given form.
+    """
+    forms = []
+    for lemma in getContentWordIndex(content_words).lemmasForForm(word):
+        forms += content_words[lemma][1]
+    return forms
+
+# ------------------------------------------------------------------------------
+def checkBagOfWordsConsistency(bow_dict, corpus_index, STOP_WORDS_LIST, content_words):
+    """
+    Compares the incrementally updated bow and reduced corpus with a full rebuild
+    (updateBagOfWordsFromList) and repairs the incremental ones where they differ.
+
+    The full rebuild is what used to happen every 40 decisions; now it is only a check.
+    Returns the number of differences found.
+    """
+    rebuilt_bow, rebuilt_corpus = updateBagOfWordsFromList(corpus_index.toTokenArray(), STOP_WORDS_LIST, content_words)
+    stale_types = [t for t in corpus_index.types() if t not in rebuilt_bow]
+    wrong_counts = [t for t in bow_dict if t in rebuilt_bow and bow_dict[t] != rebuilt_bow[t]]
+    removeDecidedFormsFromCorpus(stale_types, corpus_index, bow_dict)
+    for token_type in wrong_counts:
+        bow_dict[token_type] = rebuilt_bow[token_type]
+    differences = len(stale_types) + len(wrong_counts)
+    print("Consistency check: " + str(len(stale_types)) + " types shouldn't have been in the corpus anymore, " \
+      + str(len(wrong_counts)) + " counts were off.")
+    return differences
 
 # ------------------------------------------------------------------------------
-def processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST):
-    sorted_bow = sorted(bow_dict, key=bow_dict.get, reverse=True)
-    #print("Testing if this shit is sorted...")
-    #print(list(bow_dict)[0])
-    #print(list(sorted_bow)[0])
-    #first_item = next(iter(sorted_bow)) # first item of sorted bow is the current most frequent
-    key = sorted_bow[0]
-    value = bow_dict[key]
+def buildVariantIndex(bow_dict, content_words, STOP_WORDS_LIST):
+    """
+    Indexes all content word forms, stopwords and bow types by their normalized form,
+    so the known words a bow type might be a variant of can be found (see findVariantSuggestion).
+    """
+    variant_index = VariantIndex(normalizeWord)
+    for lemma, (word_count, forms) in content_words.items():
+        variant_index.extend(forms, ("content", lemma))
+    variant_index.extend(STOP_WORDS_LIST, ("stop", None))
+    for bow_type in bow_dict.keys():
+        variant_index.add(bow_type, ("bow", bow_type))
+    print("Indexed " + str(len(variant_index)) + " words for finding variants.")
+    return variant_index
+
+# ------------------------------------------------------------------------------
+def findVariantSuggestion(word, variant_index):
+    """
+    Returns (distance, known word, "content" or "stop", lemma) for the content word form
+    or stopword nearest to word (content words first), or None if there's none
+    within getMaxVariantDistance. Numbers are no variants of each other.
+    """
+    normalized = normalizeWord(word)
+    if not normalized.isalpha():
+        return None
+    nearest = None
+    for distance, variant, values in variant_index.findSimilar(normalized, getMaxVariantDistance(normalized)):
+        if nearest is not None and distance > nearest[0]:
+            break
+        for kind, lemma in values:
+            if kind == "content":
+                return distance, variant, kind, lemma
+            if kind == "stop" and nearest is None:
+                nearest = (distance, variant, kind, lemma)
+    return nearest
+
+# ------------------------------------------------------------------------------
+def getVariantCluster(word, suggestion, variant_index, bow_dict):
+    """
+    Returns word and all other bow types which are variants of the suggested known word:
+    they are at most as far from it as word is (or one edit, if word is the same when normalized)
+    and it is their nearest known word as well.
+    """
+    cluster = [word]
+    word_distance, known_word, kind, lemma = suggestion
+    for distance, variant, values in variant_index.findSimilar(known_word, max(word_distance, 1)):
+        for value_kind, bow_type in values:
+            if value_kind != "bow" or bow_type not in bow_dict or bow_type in cluster:
+                continue
+            variant_suggestion = findVariantSuggestion(bow_type, variant_index)
+            if variant_suggestion is not None and variant_suggestion[1:] == suggestion[1:]:
+                cluster.append(bow_type)
+    return cluster
+
+# ------------------------------------------------------------------------------
+def resolveVariantCluster(cluster, suggestion, bow_dict, content_words, STOP_WORDS_LIST, corpus_index=None, journal=None, variant_index=None):
+    """
+    Decides all types of a variant cluster like the suggested known word:
+    adds them as stopwords (with their declined forms, like [s]) or as forms
+    (with their counts) to the content word lemma.
+    """
+    distance, known_word, kind, lemma = suggestion
+    decided_forms = cluster
+    if kind == "stop":
+        decided_forms = []
+        for word in cluster:
+            new_forms = prepareForStopwordList(word)
+            new_forms.append(word)
+            decided_forms += new_forms
+            if journal is not None:
+                journal.recordStop(word, new_forms)
+        STOP_WORDS_LIST.extend(decided_forms)
+    else:
+        word_count, forms = content_words[lemma]
+        added_count = sum(bow_dict[word] for word in cluster if word in bow_dict)
+        try:
+            word_count = int(word_count) + added_count
+        except ValueError:
+            word_count = added_count
+        content_words[lemma] = [word_count, forms + [word for word in cluster if word not in forms]]
+        if journal is not None:
+            journal.recordContent(cluster[0], lemma, content_words[lemma])
+    for word in cluster:
+        if word in bow_dict:
+            bow_dict.pop(word)
+    if corpus_index is not None:
+        removeDecidedFormsFromCorpus(decided_forms, corpus_index, bow_dict)
+        if kind == "content": # like [k], also types which are a form of the lemma once normalized
+            removeContentFormsFromCorpus(content_words[lemma][1], corpus_index, bow_dict)
+    if variant_index is not None:
+        variant_index.extend(decided_forms, (kind, lemma))
+    print("Decided " + str(len(cluster)) + " types like '" + known_word + "'.")
+    return content_words
+
+# ------------------------------------------------------------------------------
+def processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST, corpus_index=None, journal=None, store=None, variant_index=None, prefetcher=None, statistics=None):
+    """
+    Asks the user about the most frequent item in the bow and processes the answer.
+
+    If corpus_index (the reduced corpus as ReducedCorpus) is given, all tokens
+    of the decided forms are removed from it and from the bow right away,
+    so the bow doesn't need to be rebuilt from the corpus.
+    If a DecisionJournal is given, every decision is recorded in it.
+    store (a WordListStore) is only needed to save the word lists when quitting.
+    If a VariantIndex (see buildVariantIndex) is given, the nearest known word is suggested
+    and [a] decides the item together with all its variants in the bow (see getVariantCluster).
+    If a BOWPrefetcher is given, the next items are lemmatized and declined while waiting for the answer.
+    statistics (ProgressStatistics) are only needed to inform about the progress when quitting.
+    """
+    if not isinstance(bow_dict, BOWPriorityQueue):
+        bow_dict = BOWPriorityQueue(bow_dict)
+    key, value = bow_dict.peekMax() # the current most frequent item
+    if prefetcher is not None:
+        prefetcher.prefetch(bow_dict)
+    suggestion = None
+    if variant_index is not None:
+        suggestion = findVariantSuggestion(key, variant_index)
+    if suggestion is not None:
+        cluster = getVariantCluster(key, suggestion, variant_index, bow_dict)
+        distance, known_word, kind, lemma = suggestion
+        print("  ~ looks like '" + known_word + "' (" + ("content word " + lemma if kind == "content" else "stopword") \
+          + "), [a] decides like that: " + " ".join(cluster))
 #for key, value in bow.items():
     while True:
         answer = input("[ " + key + " | " + str(value) + " ] ") #  to stops? [y/n] -- [q to quit]
-        if (answer == 'n') or (answer == 's') or (answer == '-'):
+        if answer == 'a' and suggestion is not None:
+            content_words = resolveVariantCluster(cluster, suggestion, bow_dict, content_words, STOP_WORDS_LIST, \
+              corpus_index, journal, variant_index)
+            break
+        elif (answer == 'n') or (answer == 's') or (answer == '-'):
             #to_stops.append(key.lower())
             # TODO add: try to lemmatize/decline
             new_forms = prepareForStopwordList(key)
             new_forms.append(key)
-            while("" in new_forms):
-                new_forms.remove("")
-            STOP_WORDS_LIST = STOP_WORDS_LIST + new_forms
+            STOP_WORDS_LIST.extend(new_forms) # no copy, STOP_WORDS_LIST is a StopwordIndex
             bow_dict.pop(key)
+            if journal is not None:
+                journal.recordStop(key, new_forms)
+            if corpus_index is not None:
+                removeDecidedFormsFromCorpus(new_forms, corpus_index, bow_dict)
+            if variant_index is not None:
+                variant_index.extend(new_forms, ("stop", None))
             break
         elif (answer == 'y') or (answer == '') or (answer == 'k') or (answer == 'c') or (answer == '+'):
             # pass value to adding function
             content_words, bow_dict = addItemToContentWordDictIfNotAlreadyIn(key, value, content_words, bow_dict)
+            for lemma in getContentWordIndex(content_words).lemmasForForm(key):
+                if journal is not None:
+                    journal.recordContent(key, lemma, content_words[lemma])
+                if variant_index is not None:
+                    variant_index.extend(content_words[lemma][1], ("content", lemma))
+            if corpus_index is not None:
+                removeContentFormsFromCorpus(getFormsOfLemmataWithForm(key, content_words) + [key], corpus_index, bow_dict)
             break
         elif answer == 'q':
-            informAboutCurrentProgress(bow_dict, corpus)
+            informAboutCurrentProgress(bow_dict, corpus, statistics)
             #printMostFrequentContentWords(content_words)
-            quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words)
+            if prefetcher is not None:
+                prefetcher.close()
+            quitBOWProcessing(bow_dict, STOP_WORDS_LIST, content_words, journal, store)
             quit()
         else:
             continue
@@ -211,7 +474,7 @@ def processOneBOWItem(corpus, bow_dict, content_words, STOP_WORDS_LIST):
 
 
 # ------------------------------------------------------------------------------
-def updateStopwordList(new_stopwords):
+def updateStopwordList(new_stopwords, file_path="stop_word_list.txt"):
     """
     This will simply write the current stopwords list to the respective file.
     It will, however, also overwrite the contents of the old file,
@@ -219,7 +482,7 @@ def updateStopwordList(new_stopwords):
     """
     stop_set = set(new_stopwords)
     new_stopwords_unique = list(stop_set)
-    writeListAsOneWordPerLineFile(new_stopwords_unique, "stop_word_list.txt")
+    writeListAsOneWordPerLineFile(new_stopwords_unique, file_path)
 
 # ------------------------------------------------------------------------------
 def addToStopWords(STOP_WORDS_LIST, list_of_new_words, logger):
@@ -230,21 +493,34 @@ def addToStopWords(STOP_WORDS_LIST, list_of_new_words, logger):
     # TODO error happens with list of lists..
 
 # ------------------------------------------------------------------------------
-def prepareForStopwordList(word):
-    logger = ToDosLogger(LOG_FILE)
+def getLemmaForDeclension(word):
+    """
+    Returns the lemma of a word the way prepareForStopwordList declines it.
+    """
     #normalized = normalizeWord(word) # this will lowercase, so might not work in all cases!
-    lemma = getLemmaStrippedOfMarker(lemmatizeWord(normalizeWord(word)))
+    return getLemmaStrippedOfMarker(lemmatizeWord(normalizeWord(word)))
+
+# ------------------------------------------------------------------------------
+def precomputeDecisionWork(word):
+    """
+    Lemmatizes and declines a bow item the way both [s] (prepareForStopwordList) and [k]
+    (createNewEntryInContentWordDict) do, so the results are cached when it's answered (see BOWPrefetcher).
+    """
+    declineLemma(getLemmaForDeclension(word))
+
+# ------------------------------------------------------------------------------
+def prepareForStopwordList(word):
+    lemma = getLemmaForDeclension(word)
     #print("[STOPS] This came out of lemmatization: " + lemma)
-    decliner = CollatinusDecliner()
+    # looked up in the precomputed declension table (see build_declension_table.py)
+    declined_forms = declineLemma(lemma)
     results = []
-    try:
-        declined_forms = decliner.decline(lemma, flatten=True)
-        unique_values = set(declined_forms)
-        results = list(unique_values)
+    if declined_forms is not None:
+        results = declined_forms
         #print("These forms will be added to Stops:")
         #print(results)
-    except:
-        logger.addToLogger("STOPS", "WARNING", "Lemma couldn't be declined: " + word)
+    else:
+        stops_logger.addToLogger("STOPS", "WARNING", "Lemma couldn't be declined: " + word)
         results.append(word)
     return results
 
@@ -254,13 +530,23 @@ def updateBagOfWordsFromString(corpus, STOP_WORDS_LIST, content_words):
     """
     Creates a bag of words from a corpus (as string). Using CLTK for Latin.
 
+    The corpus can also be an iterable of CorpusChunks (see readDirectoryAsDocuments),
+    in which case it is tokenized chunk by chunk and never joined into one string.
     Will remove linebreak-hyphens and punctuation as well as stopwords.
     WILL NOT lowercase (!) - so truecasing can be done later, if needed.
     """
-    print("\n---\nUpdating the bag of words...")
-    normalized = removeHyphensAndPunctuation(corpus)
     #tokens = normalized.split() # this would be the non-Latin/language specific way
-    tokens = tokenizeLatinWords(normalized)
+    tokens = tokenizeCorpus(corpus)
+    return updateBagOfWordsFromTokens(tokens, STOP_WORDS_LIST, content_words)
+
+# ------------------------------------------------------------------------------
+def updateBagOfWordsFromTokens(tokens, STOP_WORDS_LIST, content_words):
+    """
+    Same as updateBagOfWordsFromString, but for an already tokenized corpus
+    (e.g. from readDirectoryAsTokens, which caches the tokenization).
+    """
+    print("\n---\nUpdating the bag of words...")
+    tokens = TokenArray.fromTokens(tokens) # all filtering below works on type ids
     #print("\n---\nTokens before stopword-removal: " + str(len(tokens)))
     corpus_without_stopwords = removeStopwordsFromTokens(STOP_WORDS_LIST, tokens)
     #print("  * after: " + str(len(corpus_without_stopwords)))
@@ -268,7 +554,7 @@ def updateBagOfWordsFromString(corpus, STOP_WORDS_LIST, content_words):
     #print("  * without content words already processed: " + str(len(corpus_without_already_processed_content_words)))
     reduced_corpus = corpus_without_already_processed_content_words
     reduced_corpus = cleanCorpus(reduced_corpus)
-    bow_dict = Counter(corpus_without_already_processed_content_words)
+    bow_dict = countTokens(corpus_without_already_processed_content_words)
 
     # remove all items where count is 1 (TODO ggf change later)
     # TODO da nicht lemmatisiert, wird hier evtl durchaus zu viel weggeworfen..
@@ -283,7 +569,7 @@ def updateBagOfWordsFromString(corpus, STOP_WORDS_LIST, content_words):
     #print("Bow length after removing hapaxes etc: " + str(len(bow_dict_without_one_letters)))
     #print("With stopswords " + str(len(tokens)) + " tokens, " + str(len(reduced_corpus)) + " without.")
     print("After removing 1-letter words and hapaxes: " + str(len(bow_dict_without_one_letters)) + " left.")
-    return bow_dict_without_one_letters, reduced_corpus
+    return BOWPriorityQueue(bow_dict_without_one_letters), reduced_corpus
 
 # ------------------------------------------------------------------------------
 # ggf delete later
@@ -295,6 +581,7 @@ def updateBagOfWordsFromDictFile(corpus, STOP_WORDS_LIST, content_words):
     WILL NOT lowercase (!) - so truecasing can be done later, if needed.
     """
     print("\n---\nUpdating the bag of words...")
+    corpus = TokenArray.fromTokens(corpus) # all filtering below works on type ids
     #print("\n---\nTokens before stopword-removal: " + str(len(tokens)))
     corpus_without_stopwords = removeStopwordsFromTokens(STOP_WORDS_LIST, corpus)
     #print("  * after: " + str(len(corpus_without_stopwords)))
@@ -302,7 +589,7 @@ def updateBagOfWordsFromDictFile(corpus, STOP_WORDS_LIST, content_words):
     #print("  * without content words already processed: " + str(len(corpus_without_already_processed_content_words)))
     reduced_corpus = corpus_without_already_processed_content_words
     reduced_corpus = cleanCorpus(reduced_corpus)
-    bow_dict = Counter(corpus_without_already_processed_content_words)
+    bow_dict = countTokens(corpus_without_already_processed_content_words)
 
     # remove all items where count is 1 (TODO ggf change later)
     # TODO da nicht lemmatisiert, wird hier evtl durchaus zu viel weggeworfen..
@@ -316,7 +603,7 @@ def updateBagOfWordsFromDictFile(corpus, STOP_WORDS_LIST, content_words):
     #print("Bow length after removing hapaxes etc: " + str(len(bow_dict_without_one_letters)))
     #print("With stopswords " + str(len(tokens)) + " tokens, " + str(len(reduced_corpus)) + " without.")
     print("After removing 1-letter words and hapaxes: " + str(len(bow_dict_without_hapaxes)) + " left.")
-    return bow_dict_without_hapaxes, reduced_corpus
+    return BOWPriorityQueue(bow_dict_without_hapaxes), reduced_corpus
 
 # ------------------------------------------------------------------------------
 def updateBagOfWordsFromList(corpus_list, STOP_WORDS_LIST, content_words):
@@ -332,6 +619,7 @@ def updateBagOfWordsFromList(corpus_list, STOP_WORDS_LIST, content_words):
     # wird bei größere Datenmenge langsam ziemlich beschwerlich
     # die Maßnahme sollte es ja eig einfacher machen, nicht komplizierter
 
+    corpus_list = TokenArray.fromTokens(corpus_list) # all filtering below works on type ids
     corpus_without_stopwords = removeStopwordsFromTokens(STOP_WORDS_LIST, corpus_list)
     #print("  * after: " + str(len(corpus_without_stopwords)))
     corpus_without_already_processed_content_words = removeProcessedContentWordsFromBOW(corpus_without_stopwords, content_words)
@@ -339,7 +627,7 @@ def updateBagOfWordsFromList(corpus_list, STOP_WORDS_LIST, content_words):
     reduced_corpus = corpus_without_already_processed_content_words
     #reduced_corpus = cleanCorpus(corpus_list)
     reduced_corpus = cleanCorpus(corpus_without_already_processed_content_words)
-    bow_dict = Counter(reduced_corpus)
+    bow_dict = countTokens(reduced_corpus)
 
     # remove all items where count is 1 (TODO ggf change later)
     # TODO da nicht lemmatisiert, wird hier evtl durchaus zu viel weggeworfen..
@@ -353,7 +641,7 @@ def updateBagOfWordsFromList(corpus_list, STOP_WORDS_LIST, content_words):
     # also remove all keys that are just one letter
     #bow_dict_without_one_letters = {key:val for key, val in bow_dict_without_hapaxes.items() if len(key) != 1}
     #print("Bow length after removing hapaxes etc: " + str(len(bow_dict_without_one_letters)))
-    return bow_dict, reduced_corpus
+    return BOWPriorityQueue(bow_dict), reduced_corpus
 
 
 
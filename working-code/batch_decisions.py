@@ -0,0 +1,220 @@
+
+# ------------------------------------------------------------------------------
+# Imports
+# ------------------------------------------------------------------------------
+
+import os
+from collections import namedtuple
+
+import regex as re # sudo -H python3 -m pip install regex
+from tqdm import tqdm # to display a progress bar
+
+from helper_functions import normalizeWord
+from cltk_based_text_processing import lemmatizeWords, getLemmaStrippedOfMarker, getDeclensionTable
+from annotation_list_creation_utilities import getContentWordIndex, removeDecidedFormsFromCorpus, \
+  removeContentFormsFromCorpus, stops_logger
+
+# ------------------------------------------------------------------------------
+# Deciding the obvious bow types in one batch, by the rules of a rules file
+# ------------------------------------------------------------------------------
+# One rule per line, `<stop|keep>-<condition>: <argument>`, lines starting with # are comments.
+# For every type in the bow the first rule (from the top) that matches it decides it,
+# types no rule matches are left for the prompt. Conditions:
+#   stop: et in ad          the type is one of these words (compared normalized)
+#   stop-regex: ^[0-9]+$    the regex matches (somewhere in) the type
+#   keep-suffix: itas       the type ends with this (compared normalized)
+#   stop-max-length: 2      the type has at most this many characters (also min-length)
+#   stop-max-count: 1       the type occurs at most this many times in the corpus (also min-count)
+#   stop-lemma-in-stops     the type's lemma is a stopword
+#   keep-lemma-in-content-words  the type's lemma is a content word already
+# Like [s], stop rules naming words or lemmata also stop all declined forms of the type's lemma;
+# the other stop rules only stop the types they match.
+# ------------------------------------------------------------------------------
+
+DECISION_RULES_FILE = "decision_rules.txt"
+
+DecisionRule = namedtuple('DecisionRule', ['decision', 'condition', 'argument', 'line_number'])
+
+DECISIONS = ("stop", "keep")
+CONDITIONS = ("words", "regex", "suffix", "max-length", "min-length", "max-count", "min-count", \
+  "lemma-in-stops", "lemma-in-content-words")
+# stop rules which stop the declined forms of the lemma as well
+DECLINING_CONDITIONS = ("words", "lemma-in-stops")
+
+# ------------------------------------------------------------------------------
+def parseDecisionRule(line, line_number):
+    """
+    Returns the DecisionRule of one line of a rules file (see above), raising a ValueError
+    which names the line if it isn't one.
+    """
+    rule, separator, argument = line.partition(":")
+    decision, separator, condition = rule.strip().partition("-")
+    condition = condition or "words"
+    argument = argument.strip()
+    if decision not in DECISIONS or condition not in CONDITIONS:
+        raise ValueError("Line " + str(line_number) + " of the decision rules isn't a rule: " + line)
+    if condition == "words":
+        argument = {normalizeWord(word) for word in argument.split()}
+    elif condition == "regex":
+        argument = re.compile(argument)
+    elif condition == "suffix":
+        argument = normalizeWord(argument)
+    elif condition.startswith("max-") or condition.startswith("min-"):
+        if not argument.isdigit():
+            raise ValueError("Line " + str(line_number) + " of the decision rules needs a number: " + line)
+        argument = int(argument)
+    return DecisionRule(decision, condition, argument, line_number)
+
+# ------------------------------------------------------------------------------
+def readDecisionRules(file_path=DECISION_RULES_FILE):
+    """
+    Reads the rules file (see above) as a list of DecisionRules, in order.
+    Returns an empty list if there's no such file.
+    """
+    rules = []
+    if not os.path.exists(file_path):
+        return rules
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f.read().splitlines(), 1):
+            if line.strip() and not line.strip().startswith("#"):
+                rules.append(parseDecisionRule(line.strip(), line_number))
+    return rules
+
+# ------------------------------------------------------------------------------
+def ruleMatches(rule, word, normalized, count, lemma, STOP_WORDS_LIST, content_words):
+    condition, argument = rule.condition, rule.argument
+    if condition == "words":
+        return normalized in argument
+    if condition == "regex":
+        return argument.search(word) is not None
+    if condition == "suffix":
+        return normalized.endswith(argument)
+    if condition == "max-length":
+        return len(word) <= argument
+    if condition == "min-length":
+        return len(word) >= argument
+    if condition == "max-count":
+        return count <= argument
+    if condition == "min-count":
+        return count >= argument
+    if condition == "lemma-in-stops":
+        return bool(lemma) and STOP_WORDS_LIST.containsNormalized(getLemmaStrippedOfMarker(lemma))
+    return bool(lemma) and lemma in content_words
+
+# ------------------------------------------------------------------------------
+def getLemmata(words):
+    """
+    Returns word -> lemma (as lemmatizeWord gives it for the normalized word) for all words,
+    lemmatized in one batch.
+    """
+    return dict(zip(words, lemmatizeWords([normalizeWord(word) for word in words])))
+
+# ------------------------------------------------------------------------------
+def decideByRules(bow_dict, rules, STOP_WORDS_LIST, content_words):
+    """
+    Returns type -> (decision, rule) for every bow type a rule matches (the first one that does).
+    Only if a rule needs them, all types are lemmatized first, in one batch.
+    """
+    if not rules:
+        return {}
+    lemmata = {}
+    if any(rule.condition.startswith("lemma-") for rule in rules):
+        lemmata = getLemmata(list(bow_dict.keys()))
+    decisions = {}
+    bow_items = tqdm(list(bow_dict.items()))
+    bow_items.set_description("Applying the decision rules")
+    for word, count in bow_items:
+        normalized = normalizeWord(word)
+        for rule in rules:
+            if ruleMatches(rule, word, normalized, count, lemmata.get(word), STOP_WORDS_LIST, content_words):
+                decisions[word] = (rule.decision, rule)
+                break
+    return decisions
+
+# ------------------------------------------------------------------------------
+def applyBatchDecisions(decisions, bow_dict, content_words, STOP_WORDS_LIST, corpus_index, journal=None, variant_index=None):
+    """
+    Applies decisions (see decideByRules) the way processOneBOWItem does, but in bulk:
+    the decided types which need it (see DECLINING_CONDITIONS) are lemmatized and their
+    lemmata declined in one batch each, the stopwords and content words are extended once,
+    and the bow and reduced corpus (corpus_index, a ReducedCorpus) are only updated once at the end.
+    Returns the number of stop and keep decisions.
+    """
+    words = list(decisions)
+    declining = [word for word in words if decisions[word][0] == "keep" \
+      or decisions[word][1].condition in DECLINING_CONDITIONS]
+    lemmata = getLemmata(declining)
+    declension_table = getDeclensionTable()
+    declension_table.build(getLemmaStrippedOfMarker(lemma) for lemma in lemmata.values())
+
+    stop_forms = []
+    kept_words = {} # lemma (the content words' key) -> decided types
+    for word in words:
+        if decisions[word][0] == "stop":
+            new_forms = [word]
+            if word in lemmata:
+                lemma = getLemmaStrippedOfMarker(lemmata[word])
+                declined_forms = declension_table.getDeclinedForms(lemma) if lemma else None
+                if declined_forms is None:
+                    stops_logger.addToLogger("STOPS", "WARNING", "Lemma couldn't be declined: " + word)
+                new_forms = (declined_forms or []) + [word]
+            stop_forms += new_forms
+            if journal is not None:
+                journal.recordStop(word, new_forms)
+        else:
+            kept_words.setdefault(lemmata[word], []).append(word)
+    STOP_WORDS_LIST.extend(stop_forms)
+
+    content_words = getContentWordIndex(content_words)
+    content_forms = []
+    for lemma, kept in kept_words.items():
+        added_count = sum(bow_dict[word] for word in kept if word in bow_dict)
+        if lemma in content_words:
+            word_count, forms = content_words[lemma]
+            try:
+                word_count = int(word_count) + added_count
+            except ValueError:
+                word_count = added_count
+        else:
+            declined_forms = declension_table.getDeclinedForms(getLemmaStrippedOfMarker(lemma))
+            word_count, forms = added_count, declined_forms or []
+        content_words[lemma] = [word_count, forms + [word for word in kept if word not in forms]]
+        content_forms += content_words[lemma][1]
+        if journal is not None:
+            journal.recordContent(kept[0], lemma, content_words[lemma])
+        if variant_index is not None:
+            variant_index.extend(content_words[lemma][1], ("content", lemma))
+    if variant_index is not None:
+        variant_index.extend(stop_forms, ("stop", None))
+
+    # the one recount: every decided form leaves the reduced corpus and the bow at once
+    for word in words:
+        bow_dict.pop(word, None)
+    removeDecidedFormsFromCorpus(stop_forms, corpus_index, bow_dict)
+    removeContentFormsFromCorpus(content_forms, corpus_index, bow_dict)
+    keep_count = sum(len(kept) for kept in kept_words.values())
+    return len(words) - keep_count, keep_count
+
+# ------------------------------------------------------------------------------
+def runBatchDecisions(bow_dict, content_words, STOP_WORDS_LIST, corpus_index, journal=None, variant_index=None, rules_file=DECISION_RULES_FILE):
+    """
+    Decides every bow type a rule in rules_file matches, see decideByRules and applyBatchDecisions.
+    Returns the content words (a ContentWordDict, if it wasn't one already) and the number
+    of decisions applied, which is 0 if there's no rules file or no rule matched.
+    """
+    rules = readDecisionRules(rules_file)
+    if not rules:
+        return content_words, 0
+    decisions = decideByRules(bow_dict, rules, STOP_WORDS_LIST, content_words)
+    if not decisions:
+        return content_words, 0
+    content_words = getContentWordIndex(content_words)
+    stop_count, keep_count = applyBatchDecisions(decisions, bow_dict, content_words, STOP_WORDS_LIST, \
+      corpus_index, journal, variant_index)
+    print("Decided " + str(stop_count) + " types as stops and " + str(keep_count) + " as content words by the rules in " \
+      + rules_file + ", " + str(len(bow_dict)) + " types are left.")
+    return content_words, stop_count + keep_count
+
+# ------------------------------------------------------------------------------
+# FINIS
+# ------------------------------------------------------------------------------
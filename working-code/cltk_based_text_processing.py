@@ -2,32 +2,37 @@
 # Imports
 # ------------------------------------------------------------------------------
 
-import cltk # for processing Natural Language Processing of Latin
+import os
+import pickle # for caching the constructed backoff lemmatizer
+import threading # the lemmatization service and declension table are shared with the BOWPrefetcher's thread
 
 # ------------------------------------------------------------------------------
 # CLTK-based Functions
 # ------------------------------------------------------------------------------
 
-from cltk.stem.latin.j_v import JVReplacer
-from cltk.tokenize.word import WordTokenizer
-from cltk.tag import ner
-from cltk.lemmatize.latin.backoff import BackoffLatinLemmatizer
-from cltk.stem.lemma import LemmaReplacer
-lemmatizer = BackoffLatinLemmatizer()
-from cltk.stem.latin.declension import CollatinusDecliner
+# CLTK (for processing Natural Language Processing of Latin) and its models are
+# only imported/loaded when first used, so scripts which don't need them start fast.
+from LemmatizationService import LemmatizationService
+from DeclensionTable import DeclensionTable
 
-import unicodedata # for removing ligatures from data in pre-processing
+from GlyphNormalizer import GlyphNormalizer, JV_MAP
+
+# the constructed BackoffLatinLemmatizer is pickled here, see getBackoffLemmatizer
+MODEL_CACHE_DIRECTORY = ".model_cache"
 
 # ------------------------------------------------------------------------------
+# glyphs and j/v are normalized in one pass, see GlyphNormalizer
+glyph_normalizer = GlyphNormalizer()
+jv_table = str.maketrans(JV_MAP)
+
 def jv_replace(text):
     """
-    Will perform CLTK-based jv_replacement.
+    Will perform jv_replacement (like CLTK's JVReplacer, j -> i and v -> u).
+    Only replaces j and v, other characters stay as they are.
     """
-    jv_replacer = JVReplacer()
-    jv_normalized_text = jv_replacer.replace(text)
     # no lowercasing or Truecasing is done so far!
     # lowercasing probably won't be done but Truecasing needs bow first
-    return jv_normalized_text
+    return text.translate(jv_table)
 
 # ------------------------------------------------------------------------------
 # https://stackoverflow.com/questions/19859282/check-if-a-string-contains-a-number
@@ -49,12 +54,40 @@ def getLemmaStrippedOfMarker(cltk_lemma):
     else:
         return cltk_lemma
 
+# ------------------------------------------------------------------------------
+backoff_lemmatizer = None
+
+def getBackoffLemmatizer():
+    """
+    Returns the CLTK BackoffLatinLemmatizer.
+
+    Constructing it takes a while, so the constructed lemmatizer is pickled to
+    MODEL_CACHE_DIRECTORY (per CLTK version) and loaded from there next time.
+    """
+    global backoff_lemmatizer
+    if backoff_lemmatizer is not None:
+        return backoff_lemmatizer
+    import cltk
+    version = getattr(cltk, "__version__", "unknown")
+    model_path = os.path.join(MODEL_CACHE_DIRECTORY, "backoff_lemmatizer-" + version + ".pickle")
+    if os.path.exists(model_path):
+        with open(model_path, 'rb') as f:
+            backoff_lemmatizer = pickle.load(f)
+        return backoff_lemmatizer
+    from cltk.lemmatize.latin.backoff import BackoffLatinLemmatizer
+    backoff_lemmatizer = BackoffLatinLemmatizer()
+    os.makedirs(MODEL_CACHE_DIRECTORY, exist_ok=True)
+    with open(model_path + ".tmp", 'wb') as f:
+        pickle.dump(backoff_lemmatizer, f)
+    os.replace(model_path + ".tmp", model_path)
+    return backoff_lemmatizer
+
 # ------------------------------------------------------------------------------
 def printResultsOfLemmatization(word_list):
     """
     A debug/helper function to check the result of lemmatization and getLemmaStrippedOfMarker.
     """
-    resulting_tuple_list = lemmatizer.lemmatize(word_list)
+    resulting_tuple_list = getBackoffLemmatizer().lemmatize(word_list)
     # get lemma and form back out of the resulting list of tuples
     for item in resulting_tuple_list:
         form_found = item[0]
@@ -72,7 +105,7 @@ def lemmatizeAllWordsFromList(word_list):
     This interim function will lemmatize all words from a given list
     and return them as space-separated items in a list
     """
-    resulting_tuple_list = lemmatizer.lemmatize(word_list)
+    resulting_tuple_list = getBackoffLemmatizer().lemmatize(word_list)
     results = []
     for item in resulting_tuple_list:
         form_found = item[0]
@@ -89,9 +122,9 @@ def createNERListFromCorpus(string):
     Will use CLTK NER method on a corpus (as string).
     Will perform jv replacement in the process.
     """
+    from cltk.tag import ner
     ner_list = []
-    jv_replacer = JVReplacer()
-    text_str_iu = jv_replacer.replace(string)
+    text_str_iu = jv_replace(string)
     corpus_ner = ner.tag_ner('latin', input_text=text_str_iu)
     for tup in corpus_ner:
         if len(tup) > 1:
@@ -101,6 +134,19 @@ def createNERListFromCorpus(string):
     print(NER_unique_values)
     return ner_list
 
+# ------------------------------------------------------------------------------
+latin_word_tokenizer = None
+
+def getLatinWordTokenizer():
+    """
+    Returns the CLTK Latin WordTokenizer, creating it only once.
+    """
+    global latin_word_tokenizer
+    if latin_word_tokenizer is None:
+        from cltk.tokenize.word import WordTokenizer
+        latin_word_tokenizer = WordTokenizer('latin')
+    return latin_word_tokenizer
+
 # ------------------------------------------------------------------------------
 def tokenizeLatinWords(string):
     """
@@ -108,10 +154,27 @@ def tokenizeLatinWords(string):
     Accepts string, returns list of tokens.
     """
     print("Tokenizing...")
-    word_tokenizer = WordTokenizer('latin')
+    word_tokenizer = getLatinWordTokenizer()
     text_tokens = word_tokenizer.tokenize(string)
     return text_tokens
 
+# ------------------------------------------------------------------------------
+lemmatization_service = None
+# getLemmatizationService and getDeclensionTable are called from more than one thread,
+# this makes sure only one of each is ever created
+shared_instances_lock = threading.Lock()
+
+def getLemmatizationService():
+    """
+    Returns the LemmatizationService (one LemmaReplacer plus the persistent lemma cache),
+    creating it only once.
+    """
+    global lemmatization_service
+    with shared_instances_lock:
+        if lemmatization_service is None:
+            lemmatization_service = LemmatizationService()
+    return lemmatization_service
+
 # ------------------------------------------------------------------------------
 def lemmatizeWord(word):
     """
@@ -120,13 +183,44 @@ def lemmatizeWord(word):
     Since CLTK lemmatization always returns a list, it will only return the
     first element of that list. If you want the whole list or lemmatize more
     than one word, use lemmatizeAllWordsFromList.
+    Goes through the LemmatizationService, so every word is only lemmatized once
+    (also across sessions). To lemmatize many words at once, use lemmatizeWords.
     This function has no error checking in form of try-catch or anything.
     It's possible that lemmatization fails and thus, the returned string is empty.
     """
-    lemmatizer = LemmaReplacer('latin')
-    result = lemmatizer.lemmatize(word)
-    # always returns list
-    return result[0]
+    return getLemmatizationService().lemmatize(word)
+
+# ------------------------------------------------------------------------------
+declension_table = None
+
+def getDeclensionTable():
+    """
+    Returns the persistent DeclensionTable (lemma -> declined forms), opening it only once.
+    """
+    global declension_table
+    with shared_instances_lock:
+        if declension_table is None:
+            declension_table = DeclensionTable()
+    return declension_table
+
+# ------------------------------------------------------------------------------
+def declineLemma(lemma):
+    """
+    Returns all forms Collatinus declines the lemma to, or None if it can't be declined.
+    Looks the lemma up in the DeclensionTable first, so Collatinus only runs for new lemmata.
+    """
+    declined_forms = getDeclensionTable().getDeclinedForms(lemma)
+    if declined_forms is None:
+        return None
+    return list(declined_forms) # a copy, callers tend to append to it
+
+# ------------------------------------------------------------------------------
+def lemmatizeWords(word_list):
+    """
+    Like lemmatizeWord, but for a whole list of words which are lemmatized in one batch.
+    Returns the list of lemmata.
+    """
+    return getLemmatizationService().lemmatizeWords(word_list)
 
 
 # ------------------------------------------------------------------------------
@@ -152,25 +246,11 @@ def checkWhichGlyphsArePresent(corpus):
 # ------------------------------------------------------------------------------
 def normalizeLatinWordsInNonstandardGlyphs(string):
     """
-    Will normalize by first checking which non-standard glyphs are present,
-    then replacing them.
+    Will normalize non-standard glyphs (see GLYPH_MAP in GlyphNormalizer),
+    then remove everything which isn't ASCII after unicode normalization.
     """
-    original_string = string
     #checkWhichGlyphsArePresent(string) # only comment in for debug purposes
-    # hoffentlich deckt das das meiste ab, was Unicode nicht mag
-    string = string.replace('Æ', 'AE')
-    string = string.replace('æ', 'ae')
-    string = string.replace('ß', 'ss')
-    string = string.replace('œ', 'oe')
-    string = string.replace('Œ', 'OE')
-    string = string.replace('ƒ', 'f')
-    string = string.replace('o̅', 'on')
-    string = string.replace('ſ', 's')
-
-    unicode_normalized_text = unicodedata.normalize('NFKD',string).encode('ascii','ignore')
-    new_string = unicode_normalized_text.decode("utf-8")
-    #print("[INFO] Original string: " + original_string + "; unicode-normalized result: " + new_string)
-    return new_string
+    return glyph_normalizer.normalize(string)
 
 # ------------------------------------------------------------------------------
 def truecase(word, case_counter):
@@ -219,6 +299,8 @@ def declineWord(word, error_type_context,logger):
 
     normalized_string = normalizeLatinWordsInNonstandardGlyphs(word)
     jv_replaced_string = jv_replace(normalized_string)
+    from cltk.stem.lemma import LemmaReplacer
+    from cltk.stem.latin.declension import CollatinusDecliner
     lemmatizer = LemmaReplacer('latin')
     try:
         word_list = lemmatizer.lemmatize(word_list)
@@ -253,6 +335,8 @@ def declineEachWordInList(word_list, error_type_context,logger):
     normalized_string = normalizeLatinWordsInNonstandardGlyphs(words_string)
     jv_replaced_string = jv_replace(normalized_string)
     word_list = jv_replaced_string.split()
+    from cltk.stem.lemma import LemmaReplacer
+    from cltk.stem.latin.declension import CollatinusDecliner
     lemmatizer = LemmaReplacer('latin')
     try:
         word_list = lemmatizer.lemmatize(word_list)
@@ -0,0 +1,107 @@
+
+# ------------------------------------------------------------------------------
+# Imports
+# ------------------------------------------------------------------------------
+
+import unicodedata # to recognize combining marks
+from collections import namedtuple
+
+from AhoCorasick import AhoCorasick
+from GlyphNormalizer import GlyphNormalizer
+from helper_functions import normalizeWord
+
+# ------------------------------------------------------------------------------
+# Annotating the corpus with the lemmata of all content word forms
+# ------------------------------------------------------------------------------
+
+# one occurrence of a content word form: where it is (offsets in the chunk's text),
+# how it's written there and the lemmata it's a form of
+Annotation = namedtuple('Annotation', ['source', 'line', 'start', 'end', 'text', 'lemmas'])
+
+# the same normalization as normalizeWord, but character by character
+character_normalizer = GlyphNormalizer(replace_jv=True, lowercase=True)
+
+# ------------------------------------------------------------------------------
+def buildFormAutomaton(content_words):
+    """
+    Compiles all forms of all lemmata of the content words into one AhoCorasick automaton.
+    The forms are normalized (normalizeWord), so they match however they're written in the corpus.
+    """
+    automaton = AhoCorasick()
+    for lemma, (word_count, forms) in content_words.items():
+        for form in forms:
+            automaton.add(normalizeWord(form), lemma)
+    automaton.build()
+    return automaton
+
+# ------------------------------------------------------------------------------
+def isWordCharacter(character):
+    return character.isalnum() or unicodedata.combining(character) != 0
+
+# ------------------------------------------------------------------------------
+def annotateText(text, automaton, source=None, first_line=1):
+    """
+    Yields an Annotation for every whole word of text which is a content word form,
+    in one pass over the text.
+
+    Every character is normalized on the fly (see character_normalizer) and fed to the automaton,
+    so the offsets are those of the original text. Only matches which start and end
+    on word boundaries count; combining marks after a word belong to it.
+    """
+    table = character_normalizer.table
+    values, output_link = automaton.values, automaton.output_link
+    origins = [] # index in text of every character fed to the automaton
+    state = 0
+    line = first_line
+    for index, character in enumerate(text):
+        if character == "\n":
+            line += 1
+        normalized = table[ord(character)]
+        if not normalized:
+            continue
+        for normalized_character in normalized:
+            origins.append(index)
+            state = automaton.step(state, normalized_character)
+        if values[state] is None and not output_link[state]: # no form ends here
+            continue
+        # only the state after the whole character counts, otherwise e.g. 'aqua' would be found in 'aquæ'
+        for length, lemmas in automaton.matches(state):
+            first = len(origins) - length
+            start = origins[first]
+            if first and origins[first - 1] == start: # starts in the middle of a character
+                continue
+            if start and isWordCharacter(text[start - 1]):
+                continue
+            end = index + 1
+            while end < len(text) and unicodedata.combining(text[end]):
+                end += 1
+            if end < len(text) and text[end].isalnum():
+                continue
+            yield Annotation(source, line, start, end, text[start:end], lemmas)
+
+# ------------------------------------------------------------------------------
+def annotateChunks(chunks, automaton):
+    """
+    Streams the Annotations of a corpus given as CorpusChunks (e.g. readDirectoryAsDocuments
+    with lines_per_chunk), one chunk at a time. Offsets are relative to the chunk's text.
+    """
+    for chunk in chunks:
+        yield from annotateText(chunk.text, automaton, chunk.source, chunk.first_line)
+
+# ------------------------------------------------------------------------------
+def writeAnnotations(annotations, file_path):
+    """
+    Writes the Annotations as tab-separated lines (source, line, start, end, text, lemmata).
+    Returns how many were written.
+    """
+    count = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for annotation in annotations:
+            f.write("\t".join([str(annotation.source), str(annotation.line), str(annotation.start),
+              str(annotation.end), annotation.text, " ".join(annotation.lemmas)]) + "\n")
+            count += 1
+    return count
+
+# ------------------------------------------------------------------------------
+# FINIS
+# ------------------------------------------------------------------------------
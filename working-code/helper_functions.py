@@ -4,14 +4,37 @@
 # ------------------------------------------------------------------------------
 
 import glob # to read corpus from multiple .txt files in directory
+import mmap # to read large corpus files without copying them into memory first
+import os
 import string # for removing punctuation
-from collections import Counter # for bow creation
+from collections import Counter, namedtuple # for bow creation
+from functools import lru_cache # to normalize every type only once
 
 import regex as re # sudo -H python3 -m pip install regex
 from tqdm import tqdm # to display a progress bar
 
 from ToDosLogger import *
-from cltk_based_text_processing import tokenizeLatinWords, jv_replace, normalizeLatinWordsInNonstandardGlyphs
+from StopwordIndex import StopwordIndex
+from TokenArray import TokenArray
+from GlyphNormalizer import GlyphNormalizer
+from TEIReader import TEIReader
+from cltk_based_text_processing import tokenizeLatinWords, getLatinWordTokenizer, jv_replace, normalizeLatinWordsInNonstandardGlyphs
+
+# files bigger than this (in bytes) will be memory-mapped instead of read in one go
+MMAP_THRESHOLD = 1024 * 1024
+
+# how many distinct words normalizeWord remembers (a type in the corpus is normalized only once)
+NORMALIZE_WORD_CACHE_SIZE = 2 ** 18
+
+# one piece of the corpus together with where it came from:
+# source is the file path, first_line the line number (1-based) the text starts at;
+# for TEI files, source is "<file path>#<page>" and first_line the line on that page
+CorpusChunk = namedtuple('CorpusChunk', ['source', 'first_line', 'text'])
+
+# TEI editions (in the TEI directory) and the OCR'd `.txt` files of the same text they replace
+TEI_REPLACES = {
+    "symbola.xml": ["symbola.txt", "1617-symbola.txt"],
+}
 
 # ------------------------------------------------------------------------------
 # general helper functions for setting up the corpus
@@ -42,32 +65,132 @@ def writeListAsOneWordPerLineFile(word_list, file_to_write_path):
 
 
 # ------------------------------------------------------------------------------
-def readDirectoryAsCorpus(directory):
+def readFileAsChunks(file_path, lines_per_chunk=None):
+    """
+    Lazily reads one `.txt` file and yields its contents as CorpusChunks.
+
+    Without lines_per_chunk, the whole file is yielded as one chunk.
+    Otherwise, it is split into chunks of that many lines, each one
+    knowing the line it starts at. Then files bigger than MMAP_THRESHOLD are memory-mapped,
+    so only one chunk at a time is copied out of them (the whole file would be copied
+    anyway, so it's simply read then).
+    """
+    file_size = os.path.getsize(file_path)
+    if not file_size: # mmap can't map empty files
+        return
+    with open(file_path, 'rb') as f:
+        if lines_per_chunk is None:
+            yield CorpusChunk(file_path, 1, f.read().decode('utf-8'))
+            return
+        if file_size >= MMAP_THRESHOLD:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = f.read()
+        try:
+            start = 0
+            line_number = 1
+            while start < file_size:
+                end = start
+                for i in range(lines_per_chunk):
+                    newline = data.find(b'\n', end)
+                    if newline == -1:
+                        end = file_size
+                        break
+                    end = newline + 1
+                yield CorpusChunk(file_path, line_number, data[start:end].decode('utf-8'))
+                line_number += lines_per_chunk
+                start = end
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+# ------------------------------------------------------------------------------
+def readTEIFileAsChunks(file_path):
+    """
+    Streams a TEI edition as CorpusChunks, one per page (and one per marginal note),
+    see TEIReader. Entities like &amp; are resolved and hyphenated words joined.
+    """
+    for page, first_line, text in TEIReader(file_path):
+        source = file_path + "#" + page if page else file_path
+        yield CorpusChunk(source, first_line, text)
+
+# ------------------------------------------------------------------------------
+def readCorpusFileAsChunks(file_path, lines_per_chunk=None):
+    """
+    Reads a `.txt` file (see readFileAsChunks) or a TEI `.xml` file (see readTEIFileAsChunks).
+    """
+    if file_path.endswith(".xml"):
+        return readTEIFileAsChunks(file_path)
+    return readFileAsChunks(file_path, lines_per_chunk)
+
+# ------------------------------------------------------------------------------
+def getCorpusFiles(directory, tei_directory=None):
+    """
+    Returns the sorted `.txt` files of the directory and, if tei_directory is given,
+    the TEI `.xml` files of that directory. The `.txt` files which are replaced by
+    one of these TEI files (see TEI_REPLACES) are left out, so no text is read twice.
+    """
+    txt_files = sorted(glob.glob(directory + "/*.txt"))
+    if tei_directory is None:
+        return txt_files
+    tei_files = sorted(glob.glob(tei_directory + "/*.xml"))
+    replaced = set()
+    for file in tei_files:
+        replaced.update(TEI_REPLACES.get(os.path.basename(file), []))
+    return [file for file in txt_files if os.path.basename(file) not in replaced] + tei_files
+
+# ------------------------------------------------------------------------------
+def readDirectoryAsDocuments(directory, lines_per_chunk=None, tei_directory=None):
+    """
+    Streaming version of readDirectoryAsCorpus.
+
+    Yields the contained `.txt` files one CorpusChunk at a time (see readFileAsChunks)
+    instead of combining them into one string, so the file (and line) each text came from
+    stays known. With tei_directory, its TEI files are read as well (see getCorpusFiles).
+    Will show current progress with a progress bar.
+    """
+    files = tqdm(getCorpusFiles(directory, tei_directory))
+    for file in files:
+        files.set_description("Reading %s" % file)
+        yield from readCorpusFileAsChunks(file, lines_per_chunk)
+
+# ------------------------------------------------------------------------------
+def readDirectoryAsCorpus(directory, tei_directory=None):
     """
     Pass a directory name to this function and it will read all its contained `.txt` files as a corpus.
 
     The resulting corpus is all the texts combined together in one string.
     Will show current progss with a progress bar.
+    If you don't need the one string, use readDirectoryAsDocuments instead.
     """
-    txt_files = glob.glob(directory + "/*.txt")
-    corpus = ''
-    # add together all the texts from the directory as a common corpus
-    files = tqdm(txt_files)
-    for file in files:
-        files.set_description("Reading %s" % file)
-        with open(file, 'rt') as current_text:
-            text_as_string = current_text.read()
-            corpus = corpus + ' ' + text_as_string
+    texts = [chunk.text for chunk in readDirectoryAsDocuments(directory, tei_directory=tei_directory)]
+    corpus = ' ' + ' '.join(texts)
     return corpus
 
+# ------------------------------------------------------------------------------
+def iterateCorpusWords(corpus):
+    """
+    Yields the whitespace-separated words of a corpus.
+
+    The corpus can be given as one string or as an iterable of strings or CorpusChunks
+    (a list of tokens works as well).
+    """
+    if isinstance(corpus, str):
+        corpus = [corpus]
+    for item in corpus:
+        text = item.text if isinstance(item, CorpusChunk) else item
+        yield from text.split()
+
 # ------------------------------------------------------------------------------
 def getCorpusSize(corpus):
     """
-    Takes the corpus as a string and returns the number of unique items.
+    Takes the corpus as a string (or see iterateCorpusWords) and returns the number of unique items.
     """
-    words = corpus.split()
-    total_words = len(words)
-    unique_items = set(words)
+    total_words = 0
+    unique_items = set()
+    for word in iterateCorpusWords(corpus):
+        total_words += 1
+        unique_items.add(word)
     unique_words = len(unique_items)
     print("Corpus has " + str(total_words) + " words in total (TOKENS), with " \
     + str(unique_words) + " distinct values (TYPES).\n")
@@ -129,21 +252,73 @@ def removeHyphensAndPunctuation(corpus):
     corpus = remove_punctuation(corpus)
     return corpus
 
+# ------------------------------------------------------------------------------
+def isTEIChunk(chunk):
+    return chunk.source.split("#")[0].endswith(".xml")
+
+# ------------------------------------------------------------------------------
+def getTextForTokenizing(chunk):
+    """
+    Returns the chunk's text the way removeHyphensAndPunctuation expects it.
+    TEIReader joins hyphenated words itself, so the line breaks of TEI chunks are just
+    spaces between words; remove_hyphens would glue the words around them together.
+    """
+    if isTEIChunk(chunk):
+        return chunk.text.replace("\n", " ")
+    return chunk.text
+
+# ------------------------------------------------------------------------------
+def iterateTokenizedChunks(chunks):
+    """
+    Normalizes and tokenizes a corpus one CorpusChunk at a time.
+
+    Yields (chunk, tokens) pairs, so every token list keeps its file/line provenance.
+    Same normalization as in getBagOfWordsFromString.
+    """
+    word_tokenizer = getLatinWordTokenizer()
+    for chunk in chunks:
+        normalized = removeHyphensAndPunctuation(getTextForTokenizing(chunk))
+        yield chunk, word_tokenizer.tokenize(normalized)
+
+# ------------------------------------------------------------------------------
+def tokenizeCorpus(corpus):
+    """
+    Tokenizes a corpus given either as one string or as an iterable of CorpusChunks.
+
+    The chunks are never joined together, only the resulting tokens are.
+    """
+    if isinstance(corpus, str):
+        normalized = removeHyphensAndPunctuation(corpus)
+        return tokenizeLatinWords(normalized)
+    print("Tokenizing...")
+    tokens = []
+    for chunk, chunk_tokens in iterateTokenizedChunks(corpus):
+        tokens.extend(chunk_tokens)
+    return tokens
+
 # ------------------------------------------------------------------------------
 def getBagOfWordsFromString(corpus, STOP_WORDS_LIST):
     """
-    Creates a bag of words from a corpus (as string). Using CLTK for Latin.
+    Creates a bag of words from a corpus (as string or CorpusChunks). Using CLTK for Latin.
 
     Will remove linebreak-hyphens and punctuation as well as stopwords.
     WILL NOT lowercase (!) - so truecasing can be done later, if needed.
     """
-    normalized = removeHyphensAndPunctuation(corpus)
     #tokens = normalized.split() # this would be the non-Latin/language specific way
-    tokens = tokenizeLatinWords(normalized)
+    tokens = tokenizeCorpus(corpus)
     corpus_without_stopwords = removeStopwordsFromTokens(STOP_WORDS_LIST, tokens)
     bow_dict = Counter(corpus_without_stopwords)
     return bow_dict
 
+# ------------------------------------------------------------------------------
+def countTokens(tokens):
+    """
+    Returns a Counter of the tokens (list or TokenArray, which counts with numpy).
+    """
+    if isinstance(tokens, TokenArray):
+        return tokens.counts()
+    return Counter(tokens)
+
 # ------------------------------------------------------------------------------
 def normalizeList(the_list):
     """
@@ -159,7 +334,10 @@ def normalizeList(the_list):
 def cleanCorpus(corpus_list):
     """
     Will normalize a corpus (given as list) by removing empty items and those of len > 2.
+    A TokenArray is filtered type by type instead.
     """
+    if isinstance(corpus_list, TokenArray):
+        return corpus_list.filterTypes(lambda item: len(item) > 2)
     while "" in corpus_list:
         corpus_list.remove("")
     corpus_tokens = tqdm(corpus_list)
@@ -168,43 +346,71 @@ def cleanCorpus(corpus_list):
     return clean_list
 
 # ------------------------------------------------------------------------------
+word_normalizer = GlyphNormalizer(replace_jv=True, lowercase=True)
+
+@lru_cache(maxsize=NORMALIZE_WORD_CACHE_SIZE)
 def normalizeWord(word):
     """
     Will normalize a word (as string) by removing glyphs, performing jv_replace and lowercasing.
+
+    Results are memoized, so calling this for every token only costs
+    the actual normalization once per type.
     """
-    glyphs_removed = normalizeLatinWordsInNonstandardGlyphs(word)
-    jv_replaced = jv_replace(glyphs_removed)
-    lowercased = jv_replaced.lower()
-    return lowercased
+    # glyphs, jv_replace and lowercasing in one pass
+    return word_normalizer.normalize(word)
+
+# ------------------------------------------------------------------------------
+def normalizeTypes(tokens):
+    """
+    Returns a dict of every distinct token (type) to its normalizeWord form.
+    Use it to normalize a list of tokens type by type: [normalized[t] for t in tokens]
+    """
+    return {word: normalizeWord(word) for word in set(tokens)}
 
 
 # ------------------------------------------------------------------------------
-def removeStopwordsFromTokens(STOP_WORDS_LIST, tokens):
+def removeStopwordsFromTokens(STOP_WORDS_LIST, tokens, match_normalized=False):
     """
     Removes stopwords from a list of tokens using the STOP_WORDS_LIST.
 
+    STOP_WORDS_LIST should be a StopwordIndex (see getStopwordIndex), a plain list
+    will be turned into one first. tokens can also be a TokenArray. With match_normalized, tokens whose
+    normalized form is a (normalized) stopword are removed as well.
     Before using this function, be sure to getStopwords() again,
     so the list is up-to-date.
     """
-    stop_set = list(set(STOP_WORDS_LIST))
-    stop_words = [s for s in stop_set if s != '']
+    stop_words = STOP_WORDS_LIST
+    if not isinstance(stop_words, StopwordIndex):
+        stop_words = StopwordIndex(STOP_WORDS_LIST, normalizeWord)
+    if isinstance(tokens, TokenArray): # decide once per type
+        if match_normalized:
+            return tokens.filterTypes(lambda w: not stop_words.containsNormalized(w))
+        return tokens.filterTypes(lambda w: not w in stop_words)
     corpus_tokens = tqdm(tokens)
     corpus_tokens.set_description("Stopword Removal")
-    tokens_without_stopwords = [w for w in corpus_tokens if not w in stop_words]
-    #tokens_without_stopwords_match = [w for w in corpus_tokens if not w in stop_words]
-    #corpus_tokens_norm = tqdm(tokens_without_stopwords_match)
-    # ab Vorhandensein eines gewissen Fundus bringt das nix mehr, aber braucht Laufzeit
-    #corpus_tokens_norm.set_description("Stopword Removal Normalized")
-    #tokens_without_stopwords = [w for w in corpus_tokens_norm if not normalizeWord(w) in stop_words]
+    if match_normalized:
+        # ab Vorhandensein eines gewissen Fundus bringt das nix mehr, aber braucht Laufzeit
+        tokens_without_stopwords = [w for w in corpus_tokens if not stop_words.containsNormalized(w)]
+    else:
+        tokens_without_stopwords = [w for w in corpus_tokens if not w in stop_words]
     return tokens_without_stopwords
 
 # ------------------------------------------------------------------------------
-def getStopwords():
+def getStopwordIndex(STOP_WORDS_LIST):
+    """
+    Wraps a list of stopwords (see getStopwords) in a StopwordIndex for fast lookups.
+    It can be extended as new stopwords are found, without being rebuilt.
+    """
+    return StopwordIndex(STOP_WORDS_LIST, normalizeWord)
+
+# ------------------------------------------------------------------------------
+def getStopwords(store=None):
     """
     A function to determine Stopwords given a list from Perseus or another provided list.
 
     If `stop_word_list.txt` exists and is not empty, those custom stopwords will be used.
     Otherwise, it will set up a list of basic stopwords as seen in PERSEUS_STOPS.
+    If a WordListStore is given, its stopwords are used instead of the file.
     """
     PERSEUS_STOPS = ' a ab ac ad adhic aliqui aliquae aliquod alicuius alicui aliquo aliqua aliquorum aliquarum aliquibus aliquos aliquas aliqua aliquis aliquid an ante apud at atque aut '\
     ' autem cuius cui cum cur de deinde dum ego enim eram eras erat eramus eratis erant ergo ero eris erit erimus eritis erunt es esse esset essent est estis et etiam '\
@@ -223,7 +429,10 @@ def getStopwords():
     'sibi se donec sese vni ut uni nostro nostrum nostri noster ideo sui suae sua suam suo suis sui suum suo suorum suarum suis suos suas'
     perseus_stopwords = PERSEUS_STOPS.split()
     stops_list = []
-    stops_list = readOneWordPerLineFileAsList("stop_word_list.txt")
+    if store is not None:
+        stops_list = store.loadStopwords()
+    else:
+        stops_list = readOneWordPerLineFileAsList("stop_word_list.txt")
     # should create the file if it doesn't exist
     if not stops_list: # i.e. list is empty, add the basic ones from Perseus, otherwise they're already in there!
         stops_list = perseus_stopwords
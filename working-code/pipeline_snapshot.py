@@ -0,0 +1,113 @@
+
+# ------------------------------------------------------------------------------
+# Imports
+# ------------------------------------------------------------------------------
+
+import hashlib # for the fingerprint of the inputs
+import os
+
+import numpy as np # sudo -H python3 -m pip install numpy
+
+from BOWPriorityQueue import BOWPriorityQueue
+from TokenArray import TokenArray
+from ReducedCorpus import ReducedCorpus
+from token_cache import getFileHash, NORMALIZER_VERSION
+from helper_functions import getCorpusFiles
+
+# ------------------------------------------------------------------------------
+# Snapshot of the computed bag of words and reduced corpus
+# ------------------------------------------------------------------------------
+
+SNAPSHOT_DIRECTORY = ".pipeline_snapshot"
+# bump this if the way the bow is computed changes
+SNAPSHOT_VERSION = "1"
+
+# ------------------------------------------------------------------------------
+def getPipelineFingerprint(corpus_directory, STOP_WORDS_LIST, content_words, tei_directory=None):
+    """
+    Returns a hash of everything the bow and reduced corpus are computed from:
+    the contents of all corpus files (see getCorpusFiles), the stopwords and the content words.
+    """
+    fingerprint = hashlib.sha1()
+    fingerprint.update(("snapshot v" + SNAPSHOT_VERSION + ", normalizer v" + NORMALIZER_VERSION + "\n").encode('utf-8'))
+    for file in getCorpusFiles(corpus_directory, tei_directory):
+        fingerprint.update((os.path.basename(file) + " " + getFileHash(file) + "\n").encode('utf-8'))
+    for stopword in sorted(set(STOP_WORDS_LIST)):
+        fingerprint.update((stopword + "\n").encode('utf-8'))
+    for lemma in sorted(content_words):
+        word_count, forms = content_words[lemma]
+        fingerprint.update((lemma + "," + str(word_count) + "," + " ".join(sorted(forms)) + "\n").encode('utf-8'))
+    return fingerprint.hexdigest()
+
+# ------------------------------------------------------------------------------
+def getSnapshotPath(file_name, snapshot_directory=SNAPSHOT_DIRECTORY):
+    return os.path.join(snapshot_directory, file_name)
+
+# ------------------------------------------------------------------------------
+def replaceSnapshotFile(file_name, write, snapshot_directory=SNAPSHOT_DIRECTORY):
+    """
+    Writes one file of the snapshot with write(binary file) to a temporary file first and
+    then moves it in place (like checkpointDecisions), so the old file is never overwritten
+    while this session may still have it memory-mapped (see readPipelineSnapshot).
+    """
+    file_path = getSnapshotPath(file_name, snapshot_directory)
+    with open(file_path + ".tmp", 'wb') as f:
+        write(f)
+    os.replace(file_path + ".tmp", file_path)
+
+# ------------------------------------------------------------------------------
+def writePipelineSnapshot(fingerprint, bow_dict, reduced_corpus, snapshot_directory=SNAPSHOT_DIRECTORY):
+    """
+    Saves the bow and the reduced corpus (as vocabulary + numpy array of type ids)
+    together with the fingerprint of the inputs they were computed from.
+
+    The fingerprint is written last, so an interrupted write is never mistaken for a snapshot.
+    """
+    os.makedirs(snapshot_directory, exist_ok=True)
+    fingerprint_path = getSnapshotPath("fingerprint.txt", snapshot_directory)
+    if os.path.exists(fingerprint_path):
+        os.remove(fingerprint_path)
+    if isinstance(reduced_corpus, ReducedCorpus):
+        token_array = reduced_corpus.toTokenArray()
+    else:
+        token_array = TokenArray.fromTokens(reduced_corpus)
+    replaceSnapshotFile("vocabulary.txt", lambda f: f.write("\n".join(token_array.vocabulary).encode('utf-8')), snapshot_directory)
+    replaceSnapshotFile("ids.npy", lambda f: np.save(f, token_array.ids), snapshot_directory)
+    bow_items = list(bow_dict.items())
+    replaceSnapshotFile("bow_types.txt", lambda f: f.write("\n".join(key for key, count in bow_items).encode('utf-8')), snapshot_directory)
+    bow_counts = np.array([count for key, count in bow_items], dtype=np.int64)
+    replaceSnapshotFile("bow_counts.npy", lambda f: np.save(f, bow_counts), snapshot_directory)
+    with open(fingerprint_path, 'w') as f:
+        f.write(fingerprint)
+
+# ------------------------------------------------------------------------------
+def readLines(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return text.split("\n") if text else []
+
+# ------------------------------------------------------------------------------
+def readPipelineSnapshot(fingerprint, snapshot_directory=SNAPSHOT_DIRECTORY):
+    """
+    Returns (bow_dict, reduced_corpus) from the snapshot if it was computed
+    from the same inputs (see getPipelineFingerprint), otherwise None.
+
+    The reduced corpus is a TokenArray whose ids are memory-mapped from the snapshot.
+    """
+    fingerprint_path = getSnapshotPath("fingerprint.txt", snapshot_directory)
+    if not os.path.exists(fingerprint_path):
+        return None
+    with open(fingerprint_path, 'r') as f:
+        if f.read() != fingerprint:
+            return None
+    vocabulary = readLines(getSnapshotPath("vocabulary.txt", snapshot_directory))
+    ids = np.load(getSnapshotPath("ids.npy", snapshot_directory), mmap_mode='r')
+    bow_types = readLines(getSnapshotPath("bow_types.txt", snapshot_directory))
+    bow_counts = np.load(getSnapshotPath("bow_counts.npy", snapshot_directory)).tolist()
+    bow_dict = BOWPriorityQueue(dict(zip(bow_types, bow_counts)))
+    print("Loaded the bag of words (" + str(len(bow_dict)) + " types) from the snapshot.")
+    return bow_dict, TokenArray(vocabulary, ids)
+
+# ------------------------------------------------------------------------------
+# FINIS
+# ------------------------------------------------------------------------------
@@ -0,0 +1,175 @@
+
+# ------------------------------------------------------------------------------
+# Imports
+# ------------------------------------------------------------------------------
+
+import hashlib # for the fingerprints of the shards
+import os
+import shutil # to concatenate the shards
+import zlib # for assigning lemmata to shards
+from urllib.parse import quote # lemmata in URIs
+
+from tqdm import tqdm # to display a progress bar
+
+# ------------------------------------------------------------------------------
+# Precomputing RDF (SKOS, N-Triples) from the content words and their occurrences
+# ------------------------------------------------------------------------------
+# The export is incremental per shard, not per lemma: the lemmata are spread over
+# RDF_SHARD_COUNT shard files (by the CRC32 of the lemma), and a shard is written
+# again as a whole once any of its lemmata changed (forms or word count).
+# The occurrences aren't compared lemma by lemma, that would mean looking up every
+# lemma's occurrences for every export; instead all shards depend on the fingerprint
+# of the KWICIndex, so any change to the indexed corpus regenerates all of them.
+# ------------------------------------------------------------------------------
+
+RDF_EXPORT_DIRECTORY = "rdf_export"
+RDF_EXPORT_FILE = "content_words.nt"
+# change this to where the thesaurus will be published
+RDF_BASE_URI = "https://example.org/diss/"
+# bump this if the triples written for a lemma change, so everything is written again
+RDF_EXPORT_VERSION = "1"
+# the lemmata are spread over this many shards; only shards with changed lemmata are written again
+# (as a whole), but all of them if the corpus changed, see above
+RDF_SHARD_COUNT = 64
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+XSD_INTEGER = "<http://www.w3.org/2001/XMLSchema#integer>"
+
+# ------------------------------------------------------------------------------
+def getLemmaURI(lemma):
+    return "<" + RDF_BASE_URI + "lemma/" + quote(lemma, safe="") + ">"
+
+# ------------------------------------------------------------------------------
+def getVocabularyURI(name):
+    return "<" + RDF_BASE_URI + "vocabulary#" + name + ">"
+
+# ------------------------------------------------------------------------------
+def getLiteral(text, language=None):
+    """
+    Returns text as an N-Triples literal (escaped), tagged with the language if given.
+    """
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return '"' + escaped + '"' + ("@" + language if language else "")
+
+# ------------------------------------------------------------------------------
+def getIntegerLiteral(number):
+    return '"' + str(int(number)) + '"^^' + XSD_INTEGER
+
+# ------------------------------------------------------------------------------
+def iterateLemmaTriples(lemma, word_count, forms, occurrences):
+    """
+    Yields the N-Triples lines for one lemma: a skos:Concept with the lemma as prefLabel,
+    its forms as altLabels, its word count and every occurrence (source, line, character span).
+    """
+    subject = getLemmaURI(lemma)
+    yield " ".join([subject, RDF_TYPE, "<" + SKOS + "Concept>", "."])
+    yield " ".join([subject, "<" + SKOS + "prefLabel>", getLiteral(lemma, "la"), "."])
+    for form in dict.fromkeys(forms):
+        if form and form != lemma:
+            yield " ".join([subject, "<" + SKOS + "altLabel>", getLiteral(form, "la"), "."])
+    try:
+        yield " ".join([subject, getVocabularyURI("wordCount"), getIntegerLiteral(word_count), "."])
+    except ValueError:
+        pass # no usable word count in content_words.txt
+    yield " ".join([subject, getVocabularyURI("occurrenceCount"), getIntegerLiteral(len(occurrences)), "."])
+    for number, (source, line, start, end) in enumerate(occurrences):
+        occurrence = subject[:-1] + "#occurrence" + str(number) + ">"
+        yield " ".join([subject, getVocabularyURI("occurrence"), occurrence, "."])
+        yield " ".join([occurrence, getVocabularyURI("source"), getLiteral(source), "."])
+        yield " ".join([occurrence, getVocabularyURI("line"), getIntegerLiteral(line), "."])
+        yield " ".join([occurrence, getVocabularyURI("start"), getIntegerLiteral(start), "."])
+        yield " ".join([occurrence, getVocabularyURI("end"), getIntegerLiteral(end), "."])
+
+# ------------------------------------------------------------------------------
+def getShardNumber(lemma, shard_count=RDF_SHARD_COUNT):
+    return zlib.crc32(lemma.encode('utf-8')) % shard_count
+
+# ------------------------------------------------------------------------------
+def getShardFingerprint(lemmata, content_words, index_fingerprint):
+    """
+    Returns a hash of everything the triples of a shard are written from.
+    """
+    fingerprint = hashlib.sha1()
+    fingerprint.update((RDF_EXPORT_VERSION + " " + RDF_BASE_URI + " " + index_fingerprint + "\n").encode('utf-8'))
+    for lemma in lemmata:
+        word_count, forms = content_words[lemma]
+        fingerprint.update((lemma + "," + str(word_count) + "," + " ".join(forms) + "\n").encode('utf-8'))
+    return fingerprint.hexdigest()
+
+# ------------------------------------------------------------------------------
+def readManifest(manifest_path):
+    """
+    Reads the shard number -> fingerprint of the last export.
+    """
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            for line in f.read().splitlines():
+                shard, fingerprint = line.split("\t")
+                manifest[int(shard)] = fingerprint
+    return manifest
+
+# ------------------------------------------------------------------------------
+def writeManifest(manifest, manifest_path):
+    with open(manifest_path + ".tmp", 'w') as f:
+        for shard in sorted(manifest):
+            f.write(str(shard) + "\t" + manifest[shard] + "\n")
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+# ------------------------------------------------------------------------------
+def writeShard(shard_path, lemmata, content_words, kwic_index):
+    """
+    Streams the triples of the lemmata to shard_path, one lemma at a time.
+    """
+    with open(shard_path + ".tmp", 'w', encoding='utf-8') as f:
+        for lemma in lemmata:
+            word_count, forms = content_words[lemma]
+            occurrences = kwic_index.findOccurrences(forms) if kwic_index is not None else []
+            for triple in iterateLemmaTriples(lemma, word_count, forms, occurrences):
+                f.write(triple + "\n")
+    os.replace(shard_path + ".tmp", shard_path)
+
+# ------------------------------------------------------------------------------
+def exportContentWordsAsRDF(content_words, kwic_index=None, export_directory=RDF_EXPORT_DIRECTORY):
+    """
+    Writes the content words (and their occurrences from the KWICIndex, if given) as N-Triples
+    to export_directory/RDF_EXPORT_FILE, never holding more than one lemma's triples in memory.
+
+    The lemmata are written to RDF_SHARD_COUNT shard files first. Only the shards whose
+    lemmata (forms, word counts) changed since the last export are written again (see the
+    manifest), a whole shard at a time; if the indexed corpus changed, all of them are.
+    Then the shards are concatenated into one file.
+    Returns the number of shards which were written.
+    """
+    os.makedirs(export_directory, exist_ok=True)
+    manifest_path = os.path.join(export_directory, "manifest.txt")
+    old_manifest = readManifest(manifest_path)
+    index_fingerprint = kwic_index.getFingerprint() if kwic_index is not None else "no occurrences"
+    shards = [[] for i in range(RDF_SHARD_COUNT)]
+    for lemma in sorted(content_words):
+        shards[getShardNumber(lemma)].append(lemma)
+    manifest = {}
+    changed = []
+    for shard, lemmata in enumerate(shards):
+        manifest[shard] = getShardFingerprint(lemmata, content_words, index_fingerprint)
+        shard_path = os.path.join(export_directory, "shard-%02i.nt" % shard)
+        if old_manifest.get(shard) != manifest[shard] or not os.path.exists(shard_path):
+            changed.append(shard)
+    shard_items = tqdm(changed)
+    shard_items.set_description("Writing RDF shards")
+    for shard in shard_items:
+        writeShard(os.path.join(export_directory, "shard-%02i.nt" % shard), shards[shard], content_words, kwic_index)
+    export_path = os.path.join(export_directory, RDF_EXPORT_FILE)
+    if changed or not os.path.exists(export_path):
+        with open(export_path + ".tmp", 'wb') as export_file:
+            for shard in range(RDF_SHARD_COUNT):
+                with open(os.path.join(export_directory, "shard-%02i.nt" % shard), 'rb') as shard_file:
+                    shutil.copyfileobj(shard_file, export_file)
+        os.replace(export_path + ".tmp", export_path)
+    writeManifest(manifest, manifest_path) # last, so an interrupted export is redone next time
+    return len(changed)
+
+# ------------------------------------------------------------------------------
+# FINIS
+# ------------------------------------------------------------------------------
@@ -0,0 +1,44 @@
+
+# ------------------------------------------------------------------------------
+# Imports
+# ------------------------------------------------------------------------------
+
+import time
+
+# ------------------------------------------------------------------------------
+# Timing of the start-up phases of a script
+# ------------------------------------------------------------------------------
+
+STARTUP_TIMES_FILE = "startup_times.txt"
+
+startup_start = time.perf_counter()
+startup_phases = [] # (name of the phase, seconds since the previous mark)
+last_mark = startup_start
+
+# ------------------------------------------------------------------------------
+def markStartupPhase(name):
+    """
+    Records how long everything since the last mark (or the import of this module) took.
+    """
+    global last_mark
+    now = time.perf_counter()
+    startup_phases.append((name, now - last_mark))
+    last_mark = now
+
+# ------------------------------------------------------------------------------
+def printStartupReport(file_path=STARTUP_TIMES_FILE):
+    """
+    Prints the time of every start-up phase and appends them (one line per run) to file_path,
+    so slow starts can be compared over time.
+    """
+    total = time.perf_counter() - startup_start
+    print("\nStart-up took " + "%.2f" % total + " s:")
+    for name, seconds in startup_phases:
+        print("  " + name + ": " + "%.2f" % seconds + " s")
+    with open(file_path, "a") as f:
+        f.write(time.strftime("%Y-%m-%d %H:%M:%S") + "," + "%.3f" % total + "," \
+          + ",".join(name + "=" + "%.3f" % seconds for name, seconds in startup_phases) + "\n")
+
+# ------------------------------------------------------------------------------
+# FINIS
+# ------------------------------------------------------------------------------
@@ -0,0 +1,153 @@
+
+# ------------------------------------------------------------------------------
+# Imports
+# ------------------------------------------------------------------------------
+
+import hashlib # for the content hashes the cache is keyed by
+import os
+from multiprocessing import Pool # to tokenize several files at once
+
+from tqdm import tqdm # to display a progress bar
+
+from helper_functions import readCorpusFileAsChunks, getCorpusFiles, iterateTokenizedChunks
+
+# ------------------------------------------------------------------------------
+# On-disk cache for tokenized corpus files
+# ------------------------------------------------------------------------------
+
+TOKEN_CACHE_DIRECTORY = ".token_cache"
+# bump this whenever removeHyphensAndPunctuation, the tokenization or TEIReader change,
+# so tokens produced by the old version won't be used anymore
+NORMALIZER_VERSION = "2"
+
+# ------------------------------------------------------------------------------
+def getFileHash(file_path):
+    """
+    Returns the SHA-1 hex digest of a file's contents, reading it in blocks.
+    """
+    file_hash = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+# ------------------------------------------------------------------------------
+def getTokenCachePath(file_hash, cache_directory=TOKEN_CACHE_DIRECTORY):
+    """
+    Returns the path where the tokens of a file with the given content hash are cached.
+    """
+    return os.path.join(cache_directory, "v" + NORMALIZER_VERSION + "-" + file_hash + ".txt")
+
+# ------------------------------------------------------------------------------
+def readCachedTokens(cache_path):
+    """
+    Reads a token cache file (one token per line) as a list.
+    """
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if not text:
+        return []
+    return text.split("\n")
+
+# ------------------------------------------------------------------------------
+def writeCachedTokens(tokens, cache_path):
+    """
+    Writes tokens one per line. Writes to a temporary file first,
+    so an interrupted run never leaves a half-written cache file behind.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary_path = cache_path + ".tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(tokens))
+    os.replace(temporary_path, cache_path)
+
+# ------------------------------------------------------------------------------
+def tokenizeFile(file_path):
+    """
+    Normalizes and tokenizes one corpus file (`.txt` or TEI) the same way updateBagOfWordsFromString does.
+    """
+    tokens = []
+    for chunk, chunk_tokens in iterateTokenizedChunks(readCorpusFileAsChunks(file_path)):
+        tokens.extend(chunk_tokens)
+    return tokens
+
+# ------------------------------------------------------------------------------
+def tokenizeFileForPool(file_path):
+    """
+    Wrapper around tokenizeFile for the process pool, which needs to know
+    which file the (unordered) result belongs to.
+    """
+    return file_path, tokenizeFile(file_path)
+
+# ------------------------------------------------------------------------------
+def tokenizeFiles(file_paths, workers=None):
+    """
+    Tokenizes several corpus files, in parallel if workers != 1.
+
+    workers is the number of processes to use, None meaning one per CPU core.
+    Every file is handled by one process; the biggest files are started first.
+    Returns a dict of file path to tokens, so the order the processes finish in doesn't matter.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(file_paths))
+    progress = tqdm(total=len(file_paths))
+    progress.set_description("Tokenizing %i files with %i workers" % (len(file_paths), max(workers, 1)))
+    tokens_by_file = {}
+    if workers <= 1:
+        for file_path in file_paths:
+            tokens_by_file[file_path] = tokenizeFile(file_path)
+            progress.update(1)
+    else:
+        biggest_first = sorted(file_paths, key=os.path.getsize, reverse=True)
+        with Pool(workers) as pool:
+            for file_path, tokens in pool.imap_unordered(tokenizeFileForPool, biggest_first):
+                tokens_by_file[file_path] = tokens
+                progress.update(1)
+    progress.close()
+    return tokens_by_file
+
+# ------------------------------------------------------------------------------
+def tokenizeFileWithCache(file_path, cache_directory=TOKEN_CACHE_DIRECTORY):
+    """
+    Returns the tokens of one corpus file, using the on-disk cache if possible.
+
+    The cache is keyed by the file's content hash and NORMALIZER_VERSION,
+    so edited files are tokenized again, no matter their name or modification time.
+    """
+    cache_path = getTokenCachePath(getFileHash(file_path), cache_directory)
+    if os.path.exists(cache_path):
+        return readCachedTokens(cache_path)
+    tokens = tokenizeFile(file_path)
+    writeCachedTokens(tokens, cache_path)
+    return tokens
+
+# ------------------------------------------------------------------------------
+def readDirectoryAsTokens(directory, cache_directory=TOKEN_CACHE_DIRECTORY, workers=None, tei_directory=None):
+    """
+    Tokenizes all `.txt` files of a directory (and the TEI files of tei_directory,
+    see getCorpusFiles), only re-tokenizing new or edited ones.
+
+    The files which aren't cached yet are tokenized in parallel (see tokenizeFiles for workers).
+    Returns all tokens in one list, always in sorted file order, so the result
+    (and any Counter made from it) is the same no matter how many workers are used.
+    """
+    corpus_files = getCorpusFiles(directory, tei_directory)
+    cache_paths = {file: getTokenCachePath(getFileHash(file), cache_directory) for file in corpus_files}
+    not_cached = [file for file in corpus_files if not os.path.exists(cache_paths[file])]
+    tokens_by_file = {}
+    if not_cached:
+        tokens_by_file = tokenizeFiles(not_cached, workers)
+        for file, file_tokens in tokens_by_file.items():
+            writeCachedTokens(file_tokens, cache_paths[file])
+    tokens = []
+    for file in corpus_files:
+        if file in tokens_by_file:
+            tokens.extend(tokens_by_file.pop(file))
+        else:
+            tokens.extend(readCachedTokens(cache_paths[file]))
+    return tokens
+
+# ------------------------------------------------------------------------------
+# FINIS
+# ------------------------------------------------------------------------------